@@ -0,0 +1,292 @@
+"""Benchmark de ponta a ponta dos comandos, com saída em JSON.
+
+Popula um banco temporário com o gerador determinístico (synthetic.py), carrega
+os cogs num bot sem conexão com o Discord e chama os handlers de
+``/add_gasto``, ``/resumo_mensal``, ``/ver_metas`` e ``/exportar_pdf`` com uma
+``discord.Interaction`` falsa. A latência de cada chamada vai do início do
+handler até a resposta final ao usuário (para os relatórios, a entrega feita
+pela fila de jobs). Depois, uma segunda rodada com tracemalloc mede o pico de
+memória alocada por chamada.
+
+O resultado sai em JSON (na saída padrão ou em --output). Com --baseline, os
+p50/p99 são comparados com um resultado anterior e o script termina com código
+1 se algum piorar mais que --tolerance.
+
+Uso:
+    python benchmarks/bench_e2e.py [--users 50] [--transactions 50000] [--iterations 50]
+                                   [--concurrency 4] [--output resultado.json]
+                                   [--baseline anterior.json --tolerance 0.25]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord
+from discord.ext import commands
+
+from synthetic import seed_database
+from utils.chart_renderer import ChartRenderer
+from utils.db_manager import AsyncDBManager, DBManager
+from utils.metrics import Metrics
+from utils.report_jobs import ReportJobQueue
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+EXTENSIONS = ("cogs.finance", "cogs.goals", "cogs.reports")
+
+
+class _User:
+    def __init__(self, id):
+        self.id = int(id)
+        self.mention = f"<@{id}>"
+
+
+class _Response:
+    def __init__(self, interaction):
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def defer(self, **kwargs):
+        self._done = True
+
+    async def send_message(self, *args, **kwargs):
+        self._done = True
+        self._interaction._finish(args, kwargs)
+
+
+class _Followup:
+    def __init__(self, interaction):
+        self._interaction = interaction
+
+    async def send(self, *args, **kwargs):
+        self._interaction._finish(args, kwargs)
+
+
+class FakeInteraction:
+    """O suficiente de uma discord.Interaction para os handlers dos cogs; ``finished`` marca a resposta final."""
+
+    def __init__(self, discord_id):
+        self.user = _User(discord_id)
+        self.guild = None
+        self.guild_id = None
+        self.channel = None
+        self.channel_id = None
+        self.extras = {}
+        self.response = _Response(self)
+        self.followup = _Followup(self)
+        self.finished = asyncio.Event()
+        self.reply = None
+
+    def _finish(self, args, kwargs):
+        # A primeira mensagem é a resposta; relatórios só enviam followup ao final do job
+        if self.reply is None:
+            self.reply = kwargs.get('content', args[0] if args else None)
+            self.finished.set()
+
+    async def edit_original_response(self, **kwargs):
+        pass # Mensagens de progresso
+
+
+def percentile(values, q):
+    """Percentil por posição mais próxima (nearest-rank)."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, -(-len(ordered) * q // 1) - 1))
+    return ordered[int(index)]
+
+
+async def make_bot(url, results_dir, metrics):
+    bot = commands.Bot(command_prefix=commands.when_mentioned, intents=discord.Intents.none())
+    bot.metrics = metrics
+    bot.db = AsyncDBManager(DBManager(url), metrics=metrics)
+    bot.charts = ChartRenderer(metrics=metrics) # Sem cache de gráficos: mede a renderização de verdade
+    bot.report_jobs = ReportJobQueue(bot, results_dir=results_dir)
+    for extension in EXTENSIONS:
+        await bot.load_extension(extension)
+    await bot.report_jobs.start()
+    return bot
+
+
+def scenarios(bot, end):
+    """Comandos medidos: nome -> função (discord_id, i) que chama o handler e retorna a interação."""
+    year, month = end
+
+    def command(name):
+        cmd = bot.tree.get_command(name)
+        return lambda interaction, *args: cmd.callback(cmd.binding, interaction, *args)
+
+    add_gasto = command('add_gasto')
+    resumo = command('resumo_mensal')
+    ver_metas = command('ver_metas')
+    exportar_pdf = command('exportar_pdf')
+    return {
+        'add_gasto': lambda interaction, i: add_gasto(interaction, 10.0 + i % 90, "mercado", f"benchmark {i}"),
+        # Meses diferentes evitam que pedidos simultâneos do mesmo usuário sejam agrupados num job só
+        'resumo_mensal': lambda interaction, i: resumo(interaction, (month - 1 - i % 12) % 12 + 1, year if i % 12 < month else year - 1),
+        'ver_metas': lambda interaction, i: ver_metas(interaction),
+        'exportar_pdf': lambda interaction, i: exportar_pdf(interaction, (month - 1 - i % 12) % 12 + 1, year if i % 12 < month else year - 1, 1),
+    }
+
+
+async def run_command(handler, discord_ids, iterations, concurrency):
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        nonlocal errors
+        async with semaphore:
+            interaction = FakeInteraction(discord_ids[i % len(discord_ids)])
+            started = time.perf_counter()
+            try:
+                await handler(interaction, i)
+                await asyncio.wait_for(interaction.finished.wait(), 120)
+            except Exception:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(iterations)))
+    elapsed = time.perf_counter() - started
+    result = {'iterations': iterations, 'errors': errors, 'throughput_per_s': len(latencies) / elapsed if elapsed else 0.0}
+    if latencies:
+        result.update({
+            'p50_ms': percentile(latencies, 0.50) * 1000,
+            'p90_ms': percentile(latencies, 0.90) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'mean_ms': sum(latencies) / len(latencies) * 1000,
+            'max_ms': max(latencies) * 1000,
+        })
+    return result
+
+
+async def measure_memory(handler, discord_ids, iterations):
+    """Pico de memória Python alocada por chamada (com tracemalloc, uma chamada de cada vez)."""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for i in range(iterations):
+            interaction = FakeInteraction(discord_ids[i % len(discord_ids)])
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            await handler(interaction, i)
+            await asyncio.wait_for(interaction.finished.wait(), 120)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+    return {'peak_alloc_kib': max(peaks) / 1024, 'mean_peak_alloc_kib': sum(peaks) / len(peaks) / 1024}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(result, baseline, tolerance):
+    """Lista as latências que pioraram mais que ``tolerance`` (fração) em relação ao baseline."""
+    regressions = []
+    for name, current in result['commands'].items():
+        previous = baseline.get('commands', {}).get(name, {})
+        for key in ('p50_ms', 'p99_ms'):
+            if key in current and previous.get(key) and current[key] > previous[key] * (1 + tolerance):
+                regressions.append(f"{name} {key}: {previous[key]:.1f} -> {current[key]:.1f}")
+    return regressions
+
+
+async def main(args):
+    config = {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')}
+    metrics = Metrics()
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        seeded = seed_database(
+            DBManager(url), users=args.users, transactions=args.transactions, categories=args.categories,
+            goals=args.goals, months=args.months, seed=args.seed,
+        )
+        print(f"Banco populado em {seeded['seconds']:.1f}s: {seeded['users']} usuários, {seeded['transactions']} transações", file=sys.stderr)
+
+        bot = await make_bot(url, os.path.join(tmp, 'reports'), metrics)
+        try:
+            commands_result = {}
+            for name, handler in scenarios(bot, tuple(seeded['end'])).items():
+                commands_result[name] = await run_command(handler, seeded['discord_ids'], args.iterations, args.concurrency)
+                if args.memory_iterations:
+                    commands_result[name].update(await measure_memory(handler, seeded['discord_ids'], args.memory_iterations))
+                stats = commands_result[name]
+                print(f"{name:>14}: p50 {stats.get('p50_ms', 0):8.1f} ms | p99 {stats.get('p99_ms', 0):8.1f} ms | "
+                      f"{stats['throughput_per_s']:6.1f}/s | erros {stats['errors']}", file=sys.stderr)
+        finally:
+            await bot.report_jobs.stop()
+            bot.charts.close()
+            bot.db.close()
+
+    result = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'config': config,
+        },
+        'seed': {key: value for key, value in seeded.items() if key != 'discord_ids'},
+        'commands': commands_result,
+        'process': {
+            'max_rss_mib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 if resource else None, # KiB no Linux
+            'db_queries': sum(metrics.counters('db_queries_total').values()),
+        },
+    }
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"Regressão: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de ponta a ponta dos comandos do bot.")
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--transactions', type=int, default=50000, help="total, dividido entre os usuários")
+    parser.add_argument('--categories', type=int, default=8, help="por usuário")
+    parser.add_argument('--goals', type=int, default=3, help="por usuário")
+    parser.add_argument('--months', type=int, default=12)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--iterations', type=int, default=50, help="chamadas de cada comando")
+    parser.add_argument('--concurrency', type=int, default=4, help="chamadas simultâneas")
+    parser.add_argument('--memory-iterations', type=int, default=5, help="chamadas medidas com tracemalloc (0 desliga)")
+    parser.add_argument('--output', help="arquivo JSON de saída (padrão: saída padrão)")
+    parser.add_argument('--baseline', help="JSON de uma execução anterior para comparar")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="piora máxima aceita em relação ao baseline")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
@@ -0,0 +1,68 @@
+"""Benchmark da importação de extratos (/importar_extrato).
+
+Gera um extrato CSV sintético, importa-o num banco temporário com
+DBManager.import_transactions e mede a vazão em linhas por segundo. Em seguida
+importa o mesmo arquivo de novo, para medir o caminho em que todas as linhas
+são descartadas como duplicadas, e confere os totais mensais.
+
+Uso:
+    python benchmarks/bench_import.py [linhas]   (padrão: 100000)
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.db_manager import DBManager
+from utils.statement_import import StatementReader
+
+CATEGORIES = ["mercado", "transporte", "lazer", "saude", "moradia", "educacao"]
+
+
+def make_csv(rows):
+    rng = random.Random(42)
+    start = datetime(2020, 1, 1)
+    lines = ["Data;Descrição;Valor;Categoria"]
+    for i in range(rows):
+        date = start + timedelta(days=i * 1825 // rows)
+        if rng.random() < 0.8:
+            value = -rng.uniform(1, 500)
+            category = rng.choice(CATEGORIES)
+        else:
+            value = rng.uniform(100, 5000)
+            category = ""
+        amount = f"{value:.2f}".replace('.', ',')
+        lines.append(f"{date:%d/%m/%Y};Lançamento {i};{amount};{category}")
+    return "\n".join(lines).encode('utf-8')
+
+
+def run(db, user_id, data, label):
+    reader = StatementReader(data, 'extrato.csv')
+    started = time.perf_counter()
+    stats = db.import_transactions(user_id, reader)
+    elapsed = time.perf_counter() - started
+    print(f"{label:>10}: {stats['inserted']} inseridas, {stats['duplicates']} duplicadas, "
+          f"{reader.invalid} inválidas em {elapsed:.2f}s ({stats['rows_per_second']:,.0f} linhas/s)")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    data = make_csv(rows)
+    print(f"Extrato sintético: {rows} linhas, {len(data) / 1024 / 1024:.1f} MB")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DBManager(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        user_id = db.get_user_id("1")
+        run(db, user_id, data, "primeira")
+        run(db, user_id, data, "repetida")
+        problems = db.verify_rollups()
+        print("Totais mensais conferem." if not problems else f"Divergências nos totais mensais: {len(problems)}")
+        db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Benchmark das consultas de relatório com e sem os índices de transações.
+
+Para cada tamanho de tabela, popula um banco temporário, imprime o
+EXPLAIN QUERY PLAN das consultas usadas por /resumo_mensal e /exportar_pdf e
+mede a latência média com os índices da migração 1 e depois sem eles.
+
+Uso:
+    python benchmarks/bench_indexes.py [tamanhos]   (padrão: 10000,1000000,10000000)
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select
+
+from utils.db_manager import DBManager, Transaction
+
+USERS = 1000
+CATEGORIES = ["mercado", "transporte", "lazer", "saude", "moradia", "educacao"]
+REPETITIONS = 20
+YEAR, MONTH = 2024, 6
+
+
+def seed(path, rows):
+    rng = random.Random(42)
+    start = datetime(2020, 1, 1)
+    span = int((datetime(2025, 1, 1) - start).total_seconds())
+    conn = sqlite3.connect(path)
+    conn.executemany("INSERT INTO users (id, discord_id) VALUES (?, ?)", ((i, str(i)) for i in range(1, USERS + 1)))
+
+    def generate():
+        for _ in range(rows):
+            is_expense = rng.random() < 0.8
+            yield (
+                rng.randint(1, USERS),
+                'gasto' if is_expense else 'renda',
+                round(rng.uniform(1, 500), 2),
+                rng.choice(CATEGORIES) if is_expense else None,
+                None if is_expense else "salario",
+                (start + timedelta(seconds=rng.randrange(span))).strftime('%Y-%m-%d %H:%M:%S.%f'),
+            )
+
+    conn.executemany(
+        "INSERT INTO transactions (user_id, type, value, category, source, date) VALUES (?, ?, ?, ?, ?, ?)",
+        generate(),
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+def report_queries():
+    start, end = datetime(YEAR, MONTH, 1), datetime(YEAR, MONTH + 1, 1)
+    by_month = select(Transaction).where(
+        Transaction.user_id == 1, Transaction.date >= start, Transaction.date < end
+    ).order_by(Transaction.date)
+    by_category = select(Transaction.category, func.sum(Transaction.value)).where(
+        Transaction.user_id == 1, Transaction.type == 'gasto'
+    ).group_by(Transaction.category)
+    return {"transações do mês": by_month, "gastos por categoria": by_category}
+
+
+def measure(db, label):
+    print(f"  [{label}]")
+    with db.engine.connect() as conn:
+        for name, query in report_queries().items():
+            sql = str(query.compile(db.engine, compile_kwargs={"literal_binds": True}))
+            plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+            start = time.perf_counter()
+            for _ in range(REPETITIONS):
+                conn.execute(query).fetchall()
+            elapsed = (time.perf_counter() - start) / REPETITIONS
+            print(f"    {name}: {elapsed * 1000:.3f} ms")
+            for row in plan:
+                print(f"      {row[-1]}")
+
+
+def main(sizes):
+    for rows in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.db")
+            db = DBManager(f"sqlite:///{path}")
+            t0 = time.perf_counter()
+            seed(path, rows)
+            print(f"{rows:,} transações (carga em {time.perf_counter() - t0:.1f}s)")
+            measure(db, "com índices")
+            with db.engine.begin() as conn:
+                conn.exec_driver_sql("DROP INDEX ix_transactions_user_date")
+                conn.exec_driver_sql("DROP INDEX ix_transactions_user_type_category")
+            db.engine.dispose() # Descarta conexões com planos preparados antigos
+            measure(db, "sem índices")
+            db.engine.dispose()
+
+
+if __name__ == "__main__":
+    arg = sys.argv[1] if len(sys.argv) > 1 else "10000,1000000,10000000"
+    main([int(n) for n in arg.split(",")])
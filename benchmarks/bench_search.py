@@ -0,0 +1,150 @@
+"""Benchmark da busca textual (/buscar) sobre milhões de descrições.
+
+Cria um banco SQLite temporário com ``--rows`` transações de descrições
+sintéticas (o índice FTS5 é mantido pelos triggers da migração), e mede a
+latência de ``DBManager.search_transactions`` para palavras, prefixos, frases e
+buscas com filtro de categoria e data. Para comparação, mede também algumas
+buscas com ``LIKE '%termo%'``, que percorrem as transações do usuário.
+
+Uso:
+    python benchmarks/bench_search.py [--rows 1000000] [--users 100] [--queries 200] [--seed 42]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, text
+
+from synthetic import CATEGORY_NAMES
+from utils.db_manager import DBManager
+
+PLACES = [
+    "supermercado", "padaria", "farmácia", "posto", "restaurante", "lanchonete", "livraria", "açougue",
+    "hortifruti", "cinema", "academia", "pet shop", "loja", "mercadinho", "drogaria", "feira",
+]
+BRANDS = [
+    "pão de açúcar", "extra", "carrefour", "shell", "ipiranga", "drogasil", "renner", "americanas",
+    "magalu", "netflix", "spotify", "uber", "ifood", "rappi", "smart fit", "petz",
+]
+EXTRAS = ["centro", "shopping", "delivery", "parcelado", "pix", "cartão", "débito", "crédito", "online", "presente"]
+
+
+START = datetime(2015, 1, 1)
+MINUTES_BETWEEN = 5 # Intervalo entre as transações geradas
+
+
+def description(rng):
+    words = [rng.choice(PLACES), rng.choice(BRANDS)]
+    if rng.random() < 0.6:
+        words.append(rng.choice(EXTRAS))
+    if rng.random() < 0.3:
+        words.append(f"pedido {rng.randint(1, 99999)}")
+    return " ".join(words)
+
+
+def populate(db, rows, users, seed, chunk_size=50000):
+    """Insere ``rows`` transações com descrições, em blocos (os triggers alimentam o índice FTS5)."""
+    rng = random.Random(seed)
+    user_ids = [db.get_user_id(str(100000000000000000 + i)) for i in range(users)]
+    transactions = db.Transaction.__table__
+    for offset in range(0, rows, chunk_size):
+        chunk = [
+            {
+                'user_id': user_ids[i % users], 'type': 'gasto', 'value': round(rng.uniform(5, 500), 2),
+                'category': rng.choice(CATEGORY_NAMES[:8]), 'source': None, 'description': description(rng),
+                'date': START + timedelta(minutes=i * MINUTES_BETWEEN),
+            }
+            for i in range(offset, min(rows, offset + chunk_size))
+        ]
+        with db.engine.begin() as conn:
+            conn.execute(insert(transactions), chunk)
+    return user_ids
+
+
+def measure(call, queries):
+    latencies = []
+    hits = 0
+    for args in queries:
+        started = time.perf_counter()
+        hits += len(call(*args))
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return {
+        'p50_ms': latencies[len(latencies) // 2],
+        'p99_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        'max_ms': latencies[-1],
+        'avg_hits': hits / len(queries),
+    }
+
+
+def main(args):
+    rng = random.Random(args.seed + 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DBManager(f"sqlite:///{os.path.join(tmp, 'search.db')}")
+        if not db.full_text_search:
+            print("Este SQLite não tem FTS5; a busca não está disponível.")
+            return 1
+        started = time.perf_counter()
+        user_ids = populate(db, args.rows, args.users, args.seed)
+        print(f"{args.rows:,} transações inseridas e indexadas em {time.perf_counter() - started:.1f}s "
+              f"({args.users} usuários)")
+
+        def user():
+            return rng.choice(user_ids)
+
+        scenarios = {
+            'palavra': [(user(), rng.choice(PLACES).split()[0]) for _ in range(args.queries)],
+            'duas palavras': [(user(), f"{rng.choice(PLACES).split()[0]} {rng.choice(EXTRAS)}") for _ in range(args.queries)],
+            'prefixo': [(user(), rng.choice(BRANDS)[:3] + "*") for _ in range(args.queries)],
+            'frase': [(user(), '"' + rng.choice(BRANDS) + '"') for _ in range(args.queries)],
+            'termo raro': [(user(), f'"pedido {rng.randint(1, 99999)}"') for _ in range(args.queries)],
+        }
+        print(f"{'busca':>22} | {'p50 ms':>8} | {'p99 ms':>8} | {'máx ms':>8} | resultados")
+        for name, queries in scenarios.items():
+            stats = measure(lambda uid, q: db.search_transactions(uid, q, limit=15), queries)
+            print(f"{name:>22} | {stats['p50_ms']:8.2f} | {stats['p99_ms']:8.2f} | {stats['max_ms']:8.2f} | {stats['avg_hits']:.1f}")
+
+        middle = START + timedelta(minutes=args.rows * MINUTES_BETWEEN // 2) # Metade mais recente das transações
+        filtered = [(user(), rng.choice(BRANDS).split()[0], rng.choice(CATEGORY_NAMES[:8])) for _ in range(args.queries)]
+        stats = measure(
+            lambda uid, q, cat: db.search_transactions(uid, q, limit=15, category=cat, start_date=middle),
+            filtered,
+        )
+        print(f"{'com categoria e data':>22} | {stats['p50_ms']:8.2f} | {stats['p99_ms']:8.2f} | {stats['max_ms']:8.2f} | {stats['avg_hits']:.1f}")
+
+        # Referência: LIKE percorre todas as transações do usuário
+        like_queries = scenarios['palavra'][:max(1, args.queries // 10)]
+
+        def like(uid, q):
+            with db.engine.connect() as conn:
+                return conn.execute(
+                    text("SELECT id FROM transactions WHERE user_id = :uid AND description LIKE :q LIMIT 15"),
+                    {'uid': uid, 'q': f"%{q}%"},
+                ).all()
+
+        def like_rare(uid, q):
+            return like(uid, f"{q} inexistente")
+
+        stats = measure(like_rare, like_queries)
+        print(f"{'LIKE (sem resultados)':>22} | {stats['p50_ms']:8.2f} | {stats['p99_ms']:8.2f} | {stats['max_ms']:8.2f} | {stats['avg_hits']:.1f}")
+        db.engine.dispose()
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark da busca textual nas descrições das transações.")
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--queries', type=int, default=200, help="buscas de cada tipo")
+    parser.add_argument('--seed', type=int, default=42)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
@@ -0,0 +1,95 @@
+"""Benchmark do tempo de inicialização do bot.
+
+Mede, em um processo novo a cada rodada:
+
+  * importação: ``import main`` (discord.py, SQLAlchemy e os utilitários), e
+    confere se matplotlib e reportlab ficaram de fora;
+  * pronto: o ``setup_hook`` completo (cogs, fila de relatórios e decisão de
+    sincronizar os comandos) com um banco temporário, sem conexão ao Discord.
+    A sincronização em si é simulada; só conta se ela seria feita ou não.
+
+Uso:
+    python benchmarks/bench_startup.py [rodadas]   (padrão: 5)
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Executado em um interpretador novo, para que nada venha já importado
+CHILD = r"""
+import asyncio, json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+from utils.chart_cache import ChartCache
+from utils.chart_renderer import ChartRenderer
+from utils.db_manager import AsyncDBManager, DBManager
+from utils.metrics import Metrics
+from utils.rate_limit import RateLimiter
+from utils.report_jobs import ReportJobQueue
+
+async def ready():
+    bot = main.bot
+    bot.metrics = Metrics()
+    bot.db = AsyncDBManager(DBManager(sys.argv[1]))
+    bot.charts = ChartRenderer(workers=1)
+    bot.report_jobs = ReportJobQueue(bot)
+    bot.rate_limiter = RateLimiter(bot)
+    bot._connection.application_id = 1
+    syncs = []
+
+    async def fake_sync(*args, **kwargs):
+        syncs.append(1)
+        return bot.tree.get_commands()
+    bot.tree.sync = fake_sync
+
+    start = time.perf_counter()
+    await bot.setup_hook()
+    elapsed = time.perf_counter() - start
+    await bot.report_jobs.stop()
+    bot.rate_limiter.stop()
+    bot.charts.close()
+    bot.db.close()
+    return elapsed, len(syncs)
+
+ready_seconds, syncs = asyncio.run(ready())
+print(json.dumps({
+    'import': imported - started,
+    'ready': ready_seconds,
+    'syncs': syncs,
+    'heavy': [name for name in ('matplotlib', 'reportlab') if name in sys.modules],
+}))
+"""
+
+
+def run_once(workdir, db_path):
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, f"sqlite:///{db_path}"],
+        cwd=workdir, env={**os.environ, 'PYTHONPATH': ROOT}, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [run_once(tmp, os.path.join(tmp, 'bench.db')) for _ in range(rounds)]
+
+    imports = [r['import'] * 1000 for r in results]
+    readies = [r['ready'] * 1000 for r in results]
+    print(f"{rounds} inicializações")
+    print(f"importação: mediana {statistics.median(imports):7.1f} ms | mín {min(imports):7.1f} ms")
+    print(f"     pronto: mediana {statistics.median(readies):7.1f} ms | mín {min(readies):7.1f} ms")
+    print(f"sincronizações de comandos: {[r['syncs'] for r in results]} (só a primeira deve sincronizar)")
+    heavy = sorted({name for r in results for name in r['heavy']})
+    print("Bibliotecas pesadas carregadas: " + (", ".join(heavy) if heavy else "nenhuma"))
+
+
+if __name__ == "__main__":
+    main()
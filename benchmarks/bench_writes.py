@@ -0,0 +1,58 @@
+"""Benchmark de escritas por segundo no SQLite sob comandos simultâneos.
+
+Dispara N chamadas a AsyncDBManager.add_transaction (como /add_gasto), com até
+C em andamento ao mesmo tempo, em três configurações:
+
+  * antes: journal de rollback, synchronous=FULL, um commit por escrita;
+  * wal: StorageProfile padrão (WAL, synchronous=NORMAL), um commit por escrita;
+  * wal+fila: StorageProfile padrão com a WriteQueue agrupando os commits.
+
+Uso:
+    python benchmarks/bench_writes.py [escritas] [simultâneas]   (padrão: 2000 64)
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.db_manager import AsyncDBManager, DBManager, StorageProfile
+
+USERS = 50
+
+
+async def run(label, storage, coalesce, writes, concurrency, tmp):
+    db = AsyncDBManager(DBManager(f"sqlite:///{os.path.join(tmp, label + '.db')}", storage=storage), coalesce_writes=coalesce)
+    user_ids = [db.sync.get_user_id(str(i)) for i in range(USERS)]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            await db.add_transaction(user_ids[i % USERS], 'gasto', 10.0, category="mercado", description="carga", create_category=True)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(writes)), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+
+    failures = sum(isinstance(r, Exception) for r in results)
+    stats = db.sync.pool_stats()
+    commits = f"{db.writes.batches} commits" if db.writes else f"{writes - failures} commits"
+    print(f"{label:>9}: {(writes - failures) / elapsed:8,.0f} escritas/s | {commits} | "
+          f"falhas={failures} locks={stats['lock_errors']}")
+    db.close()
+
+
+async def main():
+    writes = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    print(f"{writes} escritas, até {concurrency} simultâneas")
+    with tempfile.TemporaryDirectory() as tmp:
+        await run("antes", StorageProfile.legacy(), False, writes, concurrency, tmp)
+        await run("wal", StorageProfile(), False, writes, concurrency, tmp)
+        await run("wal+fila", StorageProfile(), True, writes, concurrency, tmp)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
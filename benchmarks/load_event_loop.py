@@ -0,0 +1,74 @@
+"""Teste de carga: mede a responsividade do event loop sob N interações concorrentes.
+
+Compara o acesso síncrono ao DBManager (como os cogs faziam) com a fachada
+AsyncDBManager. Um "heartbeat" dorme em intervalos curtos e registra o maior
+atraso observado; com o acesso assíncrono esse atraso deve ficar próximo de zero.
+
+Uso:
+    python benchmarks/load_event_loop.py [N]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.db_manager import AsyncDBManager, DBManager
+
+HEARTBEAT_INTERVAL = 0.01
+
+
+async def heartbeat(stop, lags):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + HEARTBEAT_INTERVAL
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        lags.append(max(0.0, loop.time() - expected))
+
+
+async def fake_add_gasto_sync(db, discord_id):
+    user_id = db.get_user_id(discord_id)
+    db.add_category(user_id, "mercado")
+    db.add_transaction(user_id, 'gasto', 10.0, category="mercado", description="carga")
+
+
+async def fake_add_gasto_async(db, discord_id):
+    user_id = await db.get_user_id(discord_id)
+    await db.add_category(user_id, "mercado")
+    await db.add_transaction(user_id, 'gasto', 10.0, category="mercado", description="carga")
+
+
+async def run(label, handler, db, n):
+    stop = asyncio.Event()
+    lags = []
+    hb = asyncio.create_task(heartbeat(stop, lags))
+    await asyncio.sleep(HEARTBEAT_INTERVAL * 2)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(handler(db, str(i % 50)) for i in range(n)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await hb
+    lags.sort()
+    worst = lags[-1] if lags else 0.0
+    p99 = lags[int(len(lags) * 0.99) - 1] if lags else 0.0
+    print(f"{label:>6}: {n} interações em {elapsed:.2f}s | "
+          f"atraso do loop p99={p99 * 1000:.1f}ms máx={worst * 1000:.1f}ms")
+
+
+async def main(n):
+    db = DBManager()
+    await run("sync", fake_add_gasto_sync, db, n)
+    async_db = AsyncDBManager(db)
+    await run("async", fake_add_gasto_async, async_db, n)
+    async_db.close()
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        asyncio.run(main(n))
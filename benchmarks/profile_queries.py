@@ -0,0 +1,108 @@
+"""Perfil de consultas SQL por comando, com o SQLProfiler.
+
+Executa, num banco temporário com dados sintéticos, as mesmas chamadas ao banco
+que cada comando faz e mostra quantas consultas cada um executou. Termina com
+código 1 se algum comando passar do orçamento de consultas ou repetir a mesma
+consulta (possível N+1), para que regressões apareçam antes de chegar à produção.
+
+Uso:
+    python benchmarks/profile_queries.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.db_manager import AsyncDBManager, DBManager, add_months
+from utils.metrics import Metrics
+from utils.sql_profiler import SQLProfiler
+
+TRANSACTIONS = 2000 # No mês do relatório: o PDF lê 4 páginas de 500 linhas
+
+# Consultas esperadas por comando (com o ID do usuário já em cache)
+QUERY_BUDGETS = {
+    'add_gasto': 3, # Categoria, transação e total mensal
+    'ver_categorias': 1,
+    'ver_metas': 1,
+    'ver_transacoes': 1, # Por página, em qualquer profundidade
+    'contribuir_meta': 2,
+    'resumo_mensal': 2,
+    'exportar_pdf': 8,
+    'tendencia': 1, # 60 meses numa consulta só
+}
+
+
+async def profile(db, metrics, user_id, name, calls):
+    with metrics.scope(name):
+        for call in calls:
+            await call()
+
+
+async def main():
+    metrics = Metrics()
+    messages = []
+    profiler = SQLProfiler(metrics, slow_query_ms=50, repeat_threshold=5, log=messages.append)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = AsyncDBManager(DBManager(f"sqlite:///{os.path.join(tmp, 'profile.db')}"), metrics=metrics)
+        profiler.instrument(db.sync.engine)
+        user_id = db.sync.get_user_id("1")
+        today = datetime.now()
+        start = datetime(today.year, today.month, 1)
+        rows = [
+            {'type': 'gasto', 'value': 10.0 + i % 50, 'date': start + timedelta(minutes=i), 'category': f"cat{i % 8}",
+             'source': None, 'description': f"compra {i}"}
+            for i in range(TRANSACTIONS)
+        ]
+        db.sync.import_transactions(user_id, rows)
+        for i in range(5):
+            db.sync.create_goal(user_id, f"meta {i}", 1000.0)
+        goal_id = db.sync.get_goals(user_id)[0].id
+
+        def build_pdf():
+            from utils.pdf_report import build_report_pdf
+            summary = db.sync.get_monthly_summary(user_id, today.year, today.month)
+            end = datetime(today.year + today.month // 12, today.month % 12 + 1, 1)
+            return build_report_pdf(db.sync, user_id, "período", start, end, summary, [], None)
+
+        # Sem a WriteQueue, cujo lote é compartilhado por vários comandos e fica fora do escopo
+        await profile(db, metrics, user_id, 'add_gasto', [
+            lambda: db.run(db.sync.add_transaction, user_id, 'gasto', 12.5, category="mercado", create_category=True),
+        ])
+        await profile(db, metrics, user_id, 'ver_categorias', [lambda: db.get_categories(user_id)])
+        await profile(db, metrics, user_id, 'ver_metas', [lambda: db.get_goals(user_id)])
+        middle = db.sync.get_transactions_page(user_id, limit=TRANSACTIONS // 2)[-1]
+        await profile(db, metrics, user_id, 'ver_transacoes', [
+            lambda: db.get_transactions_page(user_id, before=(middle.date, middle.id), limit=11),
+        ])
+        await profile(db, metrics, user_id, 'contribuir_meta', [lambda: db.contribute_to_goal(user_id, goal_id, 50.0)])
+        await profile(db, metrics, user_id, 'resumo_mensal', [
+            lambda: db.get_monthly_summary(user_id, today.year, today.month),
+            lambda: db.get_goals(user_id),
+        ])
+        await profile(db, metrics, user_id, 'exportar_pdf', [
+            lambda: db.get_goals(user_id),
+            lambda: asyncio.to_thread(build_pdf),
+        ])
+        await profile(db, metrics, user_id, 'tendencia', [
+            lambda: db.get_monthly_series(user_id, *add_months(today.year, today.month, -59), today.year, today.month),
+        ])
+        db.close()
+
+    failed = False
+    print(f"{'comando':>16} | consultas | orçamento")
+    for name, stats in profiler.stats().items():
+        budget = QUERY_BUDGETS.get(name)
+        over = budget is not None and stats['max_queries'] > budget
+        failed |= over or bool(stats['repeated'])
+        print(f"{name:>16} | {stats['max_queries']:9} | {budget if budget is not None else '-':>9}{'  << acima' if over else ''}")
+    for message in messages:
+        print(message)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+"""Gerador determinístico de dados sintéticos para benchmarks.
+
+Popula um banco (qualquer URL aceita pelo DBManager, no mesmo esquema de
+``database/bot.db``) com usuários, categorias, transações e metas. A mesma
+semente e os mesmos parâmetros produzem sempre os mesmos dados, então duas
+execuções de um benchmark medem exatamente o mesmo trabalho.
+
+Uso direto (cria ou completa o banco indicado):
+    python benchmarks/synthetic.py sqlite:///database/bench.db [usuários] [transações]
+"""
+import os
+import random
+import sys
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.db_manager import DBManager, add_months, month_range
+
+CATEGORY_NAMES = [
+    "mercado", "transporte", "lazer", "saude", "moradia", "educacao", "restaurante", "farmacia",
+    "academia", "streaming", "vestuario", "viagem", "pets", "presentes", "assinaturas", "combustivel",
+    "padaria", "eletronicos", "manutencao", "impostos",
+]
+INCOME_SOURCES = ["salario", "freelance", "dividendos", "reembolso"]
+GOAL_NAMES = ["Reserva de emergência", "Viagem", "Carro novo", "Notebook", "Curso", "Casa própria"]
+
+
+def discord_id_for(index):
+    """ID de Discord sintético (estável) do usuário de índice ``index``."""
+    return str(100000000000000000 + index)
+
+
+def generate_transactions(rng, count, categories, months, end):
+    """Gera ``count`` transações espalhadas pelos ``months`` meses que terminam em ``end`` (ano, mês)."""
+    first_year, first_month = add_months(*end, -(months - 1))
+    start = month_range(first_year, first_month)[0]
+    span = (month_range(*end)[1] - start).total_seconds()
+    for i in range(count):
+        date = start + timedelta(seconds=int(span * i / count))
+        if rng.random() < 0.85:
+            yield {
+                'type': 'gasto', 'value': round(rng.lognormvariate(3.5, 1.0), 2), 'date': date,
+                'category': rng.choice(categories), 'source': None, 'description': f"Compra {i}",
+            }
+        else:
+            yield {
+                'type': 'renda', 'value': round(rng.uniform(200, 8000), 2), 'date': date,
+                'category': None, 'source': rng.choice(INCOME_SOURCES), 'description': f"Entrada {i}",
+            }
+
+
+def seed_database(db, users=50, transactions=50000, categories=8, goals=3, months=12, end=(2024, 12), seed=42):
+    """Popula ``db`` e retorna um resumo com os discord_ids criados e o tempo gasto.
+
+    ``transactions`` é o total, dividido igualmente entre os usuários;
+    ``categories`` e ``goals`` são por usuário.
+    """
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    per_user = transactions // users if users else 0
+    discord_ids = []
+    for index in range(users):
+        discord_id = discord_id_for(index)
+        discord_ids.append(discord_id)
+        user_id = db.get_user_id(discord_id)
+        names = rng.sample(CATEGORY_NAMES, min(categories, len(CATEGORY_NAMES)))
+        for name in names:
+            db.add_category(user_id, name)
+        db.import_transactions(user_id, generate_transactions(rng, per_user, names, months, end))
+        for goal_index in range(goals):
+            goal_id, _ = db.create_goal(user_id, GOAL_NAMES[goal_index % len(GOAL_NAMES)] + f" {goal_index + 1}", rng.choice([1000.0, 5000.0, 20000.0]))
+            if goal_id is not None:
+                db.contribute_to_goal(user_id, goal_id, round(rng.uniform(1, 900), 2))
+    return {
+        'discord_ids': discord_ids,
+        'users': users,
+        'transactions': per_user * users,
+        'categories_per_user': categories,
+        'goals_per_user': goals,
+        'months': months,
+        'end': list(end),
+        'seed': seed,
+        'seconds': time.perf_counter() - started,
+    }
+
+
+if __name__ == "__main__":
+    url = sys.argv[1] if len(sys.argv) > 1 else "sqlite:///database/bench.db"
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    transactions = int(sys.argv[3]) if len(sys.argv) > 3 else 50000
+    result = seed_database(DBManager(url), users=users, transactions=transactions)
+    print(f"{result['users']} usuários e {result['transactions']} transações em {result['seconds']:.1f}s ({url})")
@@ -1,6 +1,7 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+from utils.rate_limit import rate_limit
 
 class Admin(commands.Cog):
     def __init__(self, bot):
@@ -29,5 +30,142 @@ class Admin(commands.Cog):
         except discord.HTTPException as e:
             await interaction.followup.send(f"Ocorreu um erro ao apagar mensagens: {e}")
 
+    @app_commands.command(name="status_db", description="Exibe estatísticas do pool de conexões do banco de dados.")
+    @app_commands.default_permissions(administrator=True)
+    async def status_db(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+
+        stats = self.bot.db.sync.pool_stats() # Leitura em memória, não acessa o banco
+        embed = discord.Embed(title="Pool de Conexões do Banco", color=discord.Color.dark_grey())
+        embed.add_field(name="Em uso", value=f"{stats['checked_out']} de {stats['size']} (+{stats['overflow']} overflow)", inline=False)
+        embed.add_field(name="Conexões abertas", value=str(stats['connects']), inline=True)
+        embed.add_field(name="Checkouts", value=str(stats['checkouts']), inline=True)
+        embed.add_field(name="Invalidações", value=str(stats['invalidations']), inline=True)
+        embed.add_field(name="Erros de lock", value=str(stats['lock_errors']), inline=True)
+        if self.bot.db.writes is not None:
+            writes = self.bot.db.writes.stats()
+            per_commit = writes['writes'] / writes['batches'] if writes['batches'] else 0
+            embed.add_field(name="Escritas agrupadas", value=f"{writes['writes']} em {writes['batches']} commits ({per_commit:.1f} por commit, {writes['pending']} na fila)", inline=False)
+        await interaction.followup.send(embed=embed)
+
+    @app_commands.command(name="status_shards", description="Exibe latência, servidores e taxa de interações de cada shard.")
+    @app_commands.default_permissions(administrator=True)
+    async def status_shards(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+
+        stats = self.bot.shard_stats
+        embed = discord.Embed(
+            title="Shards deste Processo",
+            description=f"Eventos do gateway: {stats.events.rate():.1f}/s (total {stats.events.total})",
+            color=discord.Color.dark_grey(),
+        )
+        for shard in stats.snapshot()[:25]: # Limite de campos de um embed
+            latency = f"{shard['latency_ms']:.0f} ms" if shard['latency_ms'] is not None else "—"
+            embed.add_field(
+                name=f"Shard {shard['id']}",
+                value=(
+                    f"Latência: {latency}\n"
+                    f"Servidores: {shard['guilds']}\n"
+                    f"Interações: {shard['interactions_per_minute']:.1f}/min ({shard['interactions']} no total)\n"
+                    f"Reconexões: {max(shard['connects'] - 1, 0)} | Retomadas: {shard['resumes']}"
+                ),
+                inline=True,
+            )
+        await interaction.followup.send(embed=embed)
+
+    @app_commands.command(name="metricas", description="Exibe latência por comando, tempo no banco, gráficos e filas.")
+    @app_commands.default_permissions(administrator=True)
+    async def metricas(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+
+        metrics = self.bot.metrics
+        embed = discord.Embed(title="Métricas deste Processo", color=discord.Color.dark_grey())
+
+        def ms(seconds):
+            return f"{seconds * 1000:.0f} ms" if seconds is not None else "—"
+
+        def field(name, lines):
+            value = "\n".join(lines) or "Sem dados ainda."
+            embed.add_field(name=name, value=value[:1024], inline=False)
+
+        errors = {}
+        for labels, count in metrics.counters('command_errors_total').items():
+            name = dict(labels)['command']
+            errors[name] = errors.get(name, 0) + count
+        queries = {dict(labels)['command']: h for labels, h in metrics.histograms('command_db_queries').items()}
+        commands = sorted(metrics.histograms('command_duration_seconds').items(), key=lambda item: -item[1].count)
+        lines = []
+        for labels, histogram in commands[:10]:
+            name = dict(labels)['command']
+            per_command = queries.get(name)
+            avg_queries = per_command.sum / per_command.count if per_command and per_command.count else 0
+            lines.append(
+                f"`/{name}`: {histogram.count}x | p50 {ms(histogram.quantile(0.5))} | p95 {ms(histogram.quantile(0.95))} | "
+                f"{avg_queries:.1f} consultas | {errors.get(name, 0)} erros"
+            )
+        field("Comandos", lines)
+
+        calls = sorted(metrics.histograms('db_call_duration_seconds').items(), key=lambda item: -item[1].sum)
+        field("Banco (por tempo total)", [
+            f"`{dict(labels)['method']}`: {h.count}x | média {ms(h.sum / h.count)} | p95 {ms(h.quantile(0.95))}"
+            for labels, h in calls[:8]
+        ])
+
+        lines = []
+        for labels, h in metrics.histograms('chart_render_seconds').items():
+            lines.append(f"Gráfico {dict(labels)['kind']}: {h.count}x | p95 {ms(h.quantile(0.95))}")
+        for metric, label in (('report_build_seconds', "Relatório"), ('report_pdf_render_seconds', "PDF (ReportLab)"), ('report_upload_seconds', "Envio")):
+            for labels, h in metrics.histograms(metric).items():
+                kind = dict(labels).get('kind')
+                lines.append(f"{label}{f' {kind}' if kind else ''}: {h.count}x | p95 {ms(h.quantile(0.95))}")
+        cache_hits = sum(metrics.counters('chart_cache_hits_total').values())
+        failures = sum(metrics.counters('chart_failures_total').values()) + sum(metrics.counters('report_failures_total').values())
+        lines.append(f"Gráficos do cache: {cache_hits} | Falhas: {failures}")
+        charts = getattr(self.bot, 'charts', None)
+        if charts is not None and charts.cache is not None:
+            cache = charts.cache.stats()
+            lines.append(
+                f"Cache de gráficos: {cache['memory_entries']} em memória ({cache['memory_bytes'] / 2**20:.1f} MB) | "
+                f"{cache['disk_entries']} em disco ({cache['disk_bytes'] / 2**20:.1f} MB)"
+            )
+        field("Gráficos e Relatórios", lines)
+
+        if getattr(self.bot, 'sql_profiler', None) is not None:
+            slow = sum(metrics.counters('db_slow_queries_total').values())
+            repeated = metrics.counters('db_repeated_statements_total')
+            lines = [f"Consultas lentas: {slow}"]
+            lines += [f"Repetições em `{dict(labels)['command']}`: {count}" for labels, count in sorted(repeated.items(), key=lambda item: -item[1])[:5]]
+            field("Profiler de SQL", lines)
+
+        gauges = metrics.gauge_values()
+        field("Filas", [
+            f"Gráficos: {gauges.get('chart_queue_depth', '—')} | Relatórios: {gauges.get('report_queue_depth', '—')} | "
+            f"Escritas: {gauges.get('write_queue_depth', '—')} | Conexões em uso: {gauges.get('db_connections_in_use', '—')}",
+            f"Atraso do event loop: {ms(gauges.get('event_loop_lag_seconds'))} | "
+            f"Comandos recusados pelo limite de uso: {sum(metrics.counters('rate_limited_total').values())}",
+        ])
+        await interaction.followup.send(embed=embed)
+
+    @app_commands.command(name="verificar_resumos", description="Verifica e repara os totais mensais pré-agregados.")
+    @app_commands.default_permissions(administrator=True)
+    @rate_limit('importacao')
+    async def verificar_resumos(self, interaction: discord.Interaction):
+        # Percorre as transações de todos os usuários: só o dono do bot pode usar, não os admins dos servidores
+        if not await self.bot.is_owner(interaction.user):
+            await interaction.response.send_message("Só o dono do bot pode verificar os totais mensais.", ephemeral=True)
+            return
+        await interaction.response.defer(ephemeral=True)
+
+        drift = await self.bot.db.verify_rollups()
+        if not drift:
+            await interaction.followup.send("Os totais mensais estão consistentes com as transações. ✅")
+            return
+
+        # Um commit por usuário divergente, para não segurar o lock de escrita com a tabela inteira
+        users = sorted({key[0] for key in drift})
+        for user_id in users:
+            await self.bot.db.rebuild_rollups(user_id)
+        await interaction.followup.send(f"Foram encontradas **{len(drift)}** divergências nos totais mensais; os totais de {len(users)} usuário(s) foram reconstruídos.")
+
 async def setup(bot):
     await bot.add_cog(Admin(bot))
\ No newline at end of file
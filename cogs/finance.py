@@ -1,28 +1,48 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from utils.db_manager import DBManager # Certifique-se de que a importação está correta
+from utils.category_delete import CategoryDeleter
+from utils.rate_limit import rate_limit
+from utils.statement_import import StatementReader
+from utils.transaction_browser import TransactionBrowser, format_transaction
+from datetime import datetime, timedelta
+
+MAX_IMPORT_BYTES = 20 * 1024 * 1024 # Tamanho máximo do extrato importado
+SEARCH_RESULTS = 15 # Resultados mostrados pelo /buscar
+
+
+def parse_period(de, ate):
+    """Converte as datas DD/MM/AAAA opcionais em filtros start_date/end_date (com ``ate`` inclusivo) e sua descrição."""
+    filters = {}
+    description = []
+    if de:
+        filters['start_date'] = datetime.strptime(de, '%d/%m/%Y')
+        description.append(f"a partir de {de}")
+    if ate:
+        filters['end_date'] = datetime.strptime(ate, '%d/%m/%Y') + timedelta(days=1)
+        description.append(f"até {ate}")
+    return filters, description
+
 
 class Finance(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db = DBManager()
+        self.db = bot.db
+        self.autocomplete = getattr(bot, 'autocomplete', None)
+        self.deleter = CategoryDeleter(self.db)
+
+    async def cog_unload(self):
+        self.deleter.close()
 
     @app_commands.command(name="add_gasto", description="Adiciona um novo gasto.")
     @app_commands.describe(valor="Valor do gasto", categoria="Categoria do gasto", descricao="Descrição do gasto (opcional)")
+    @rate_limit('escrita')
     async def add_gasto(self, interaction: discord.Interaction, valor: float, categoria: str, descricao: str = None):
         await interaction.response.defer()
-        user_obj = self.db.get_or_create_user(str(interaction.user.id)) # Agora retorna o objeto User
+        user_id = await self.db.get_user_id(str(interaction.user.id))
         
-        # Opcional: Verificar se a categoria existe ou criar
-        # Passa o objeto user_obj para add_category
-        success, msg = self.db.add_category(user_obj, categoria) 
-        if not success and "já existe" not in msg:
-            await interaction.followup.send(f"Erro na categoria: {msg}")
-            return
-
-        # Passa o objeto user_obj para add_transaction
-        transaction = self.db.add_transaction(user_obj, 'gasto', valor, category=categoria.lower(), description=descricao)
+        # Cria a categoria, se necessário, na mesma transação do gasto
+        transaction = await self.db.add_transaction(user_id, 'gasto', valor, category=categoria.lower(), description=descricao, create_category=True)
         if transaction:
             await interaction.followup.send(f"Gasto de R$ {valor:,.2f} em '{categoria}' registrado com sucesso!")
         else:
@@ -30,12 +50,13 @@ class Finance(commands.Cog):
 
     @app_commands.command(name="add_renda", description="Adiciona uma nova renda.")
     @app_commands.describe(valor="Valor da renda", fonte="Fonte da renda", descricao="Descrição da renda (opcional)")
+    @rate_limit('escrita')
     async def add_renda(self, interaction: discord.Interaction, valor: float, fonte: str, descricao: str = None):
         await interaction.response.defer()
-        user_obj = self.db.get_or_create_user(str(interaction.user.id)) # Agora retorna o objeto User
+        user_id = await self.db.get_user_id(str(interaction.user.id))
         
-        # Passa o objeto user_obj para add_transaction
-        transaction = self.db.add_transaction(user_obj, 'renda', valor, source=fonte, description=descricao)
+        # Passa o user_id para add_transaction
+        transaction = await self.db.add_transaction(user_id, 'renda', valor, source=fonte, description=descricao)
         if transaction:
             await interaction.followup.send(f"Renda de R$ {valor:,.2f} de '{fonte}' registrada com sucesso!")
         else:
@@ -43,17 +64,18 @@ class Finance(commands.Cog):
     
     @app_commands.command(name="add_categoria", description="Adiciona uma nova categoria de gasto.")
     @app_commands.describe(nome="Nome da nova categoria")
+    @rate_limit('escrita')
     async def add_category_cmd(self, interaction: discord.Interaction, nome: str):
         await interaction.response.defer()
-        user_obj = self.db.get_or_create_user(str(interaction.user.id)) # Agora retorna o objeto User
-        success, message = self.db.add_category(user_obj, nome) # Passa o objeto user_obj
+        user_id = await self.db.get_user_id(str(interaction.user.id))
+        success, message = await self.db.add_category(user_id, nome)
         await interaction.followup.send(message)
 
     @app_commands.command(name="ver_categorias", description="Lista suas categorias de gasto existentes.")
     async def view_categories(self, interaction: discord.Interaction):
         await interaction.response.defer()
-        user_obj = self.db.get_or_create_user(str(interaction.user.id)) # Agora retorna o objeto User
-        categories = self.db.get_categories(user_obj) # Passa o objeto user_obj
+        user_id = await self.db.get_user_id(str(interaction.user.id))
+        categories = await self.db.get_categories(user_id)
         
         if not categories:
             await interaction.followup.send("Você não tem nenhuma categoria registrada ainda.")
@@ -68,12 +90,135 @@ class Finance(commands.Cog):
         await interaction.followup.send(embed=embed)
 
     @app_commands.command(name="del_categoria", description="Deleta uma categoria de gasto existente.")
-    @app_commands.describe(nome="Nome da categoria a ser deletada")
+    @app_commands.describe(nome="Nome da categoria a ser deletada (com todos os seus gastos)")
+    @rate_limit('escrita')
     async def delete_category_cmd(self, interaction: discord.Interaction, nome: str):
         await interaction.response.defer()
-        user_obj = self.db.get_or_create_user(str(interaction.user.id)) # Agora retorna o objeto User
-        success, message = self.db.delete_category(user_obj, nome) # Passa o objeto user_obj
+        user_id = await self.db.get_user_id(str(interaction.user.id))
+        if not await self.db.has_category(user_id, nome):
+            await interaction.followup.send(f"A categoria '{nome}' não foi encontrada.")
+            return
+        # As transações são apagadas em segundo plano, em lotes, após a janela para desfazer
+        if not await self.deleter.start(interaction, user_id, nome):
+            await interaction.followup.send(f"A categoria '{nome}' já está sendo apagada.")
+
+    @app_commands.command(name="ver_transacoes", description="Navega pelas suas transações, da mais recente para a mais antiga.")
+    @app_commands.describe(
+        tipo="Mostrar só gastos ou só rendas (opcional)",
+        categoria="Mostrar só gastos desta categoria (opcional)",
+        de="A partir desta data (DD/MM/AAAA, opcional)",
+        ate="Até esta data, inclusive (DD/MM/AAAA, opcional)",
+    )
+    @app_commands.choices(tipo=[
+        app_commands.Choice(name="Gastos", value="gasto"),
+        app_commands.Choice(name="Rendas", value="renda"),
+    ])
+    async def view_transactions(self, interaction: discord.Interaction, tipo: app_commands.Choice[str] = None, categoria: str = None, de: str = None, ate: str = None):
+        await interaction.response.defer(ephemeral=True) # Só quem pediu vê o histórico
+        try:
+            filters, description = parse_period(de, ate)
+        except ValueError:
+            await interaction.followup.send("Formato de data inválido. Use DD/MM/AAAA.")
+            return
+        if tipo is not None:
+            filters['type'] = tipo.value
+            description.insert(0, tipo.name)
+        if categoria:
+            filters['category'] = categoria.lower()
+            description.insert(0, f"Categoria {categoria.lower()}")
+
+        user_id = await self.db.get_user_id(str(interaction.user.id))
+        view = TransactionBrowser(self.db, user_id, interaction.user.id, filters, description=", ".join(description) or None)
+        embed = await view.start()
+        view.message = await interaction.followup.send(embed=embed, view=view)
+
+    @app_commands.command(name="buscar", description="Busca transações pela descrição.")
+    @app_commands.describe(
+        termos='Palavras a buscar; use "aspas" para frases e * no fim para prefixos (ex: super*)',
+        categoria="Buscar só gastos desta categoria (opcional)",
+        de="A partir desta data (DD/MM/AAAA, opcional)",
+        ate="Até esta data, inclusive (DD/MM/AAAA, opcional)",
+    )
+    async def search_transactions(self, interaction: discord.Interaction, termos: str, categoria: str = None, de: str = None, ate: str = None):
+        await interaction.response.defer(ephemeral=True) # Só quem pediu vê o histórico
+        if not self.db.full_text_search:
+            await interaction.followup.send("A busca não está disponível neste banco de dados (o SQLite precisa ter FTS5).")
+            return
+        try:
+            filters, description = parse_period(de, ate)
+        except ValueError:
+            await interaction.followup.send("Formato de data inválido. Use DD/MM/AAAA.")
+            return
+        if categoria:
+            filters['category'] = categoria.lower()
+            description.insert(0, f"categoria {categoria.lower()}")
+
+        user_id = await self.db.get_user_id(str(interaction.user.id))
+        try:
+            rows = await self.db.search_transactions(user_id, termos, limit=SEARCH_RESULTS, **filters)
+        except ValueError as e:
+            await interaction.followup.send(str(e))
+            return
+        if not rows:
+            await interaction.followup.send(f"Nenhuma transação encontrada para '{termos}'.")
+            return
+
+        embed = discord.Embed(
+            title=f"Resultados para '{termos[:100]}'",
+            description=", ".join(description).capitalize() or None,
+            color=discord.Color.dark_teal()
+        )
+        embed.add_field(name="Mais relevantes primeiro", value="\n".join(format_transaction(row) for row in rows)[:1024], inline=False)
+        if len(rows) == SEARCH_RESULTS:
+            embed.set_footer(text=f"Mostrando os {SEARCH_RESULTS} primeiros resultados. Refine a busca ou use filtros para ver outros.")
+        await interaction.followup.send(embed=embed)
+
+    @app_commands.command(name="importar_extrato", description="Importa transações de um extrato bancário CSV ou OFX.")
+    @app_commands.describe(
+        arquivo="Extrato em CSV (com colunas data e valor) ou OFX",
+        categoria="Categoria dos gastos sem categoria no arquivo",
+        fonte="Fonte das rendas sem fonte no arquivo",
+    )
+    @rate_limit('importacao')
+    async def import_statement(self, interaction: discord.Interaction, arquivo: discord.Attachment, categoria: str = "importado", fonte: str = "importado"):
+        await interaction.response.defer()
+        if arquivo.size > MAX_IMPORT_BYTES:
+            await interaction.followup.send(f"O arquivo é grande demais (máximo de {MAX_IMPORT_BYTES // (1024 * 1024)} MB).")
+            return
+
+        user_id = await self.db.get_user_id(str(interaction.user.id))
+        reader = StatementReader(await arquivo.read(), arquivo.filename, default_category=categoria, default_source=fonte)
+        try:
+            stats = await self.db.import_transactions(user_id, reader)
+        except ValueError as e:
+            await interaction.followup.send(f"Não foi possível ler o extrato: {e}")
+            return
+
+        message = (
+            f"Importação concluída: {stats['inserted']} transações adicionadas, "
+            f"{stats['duplicates']} já existentes ignoradas"
+        )
+        if reader.invalid:
+            message += f" e {reader.invalid} linhas inválidas descartadas"
+        message += f" ({stats['rows_per_second']:,.0f} linhas/s)."
         await interaction.followup.send(message)
 
+    # --- Autocomplete (servido da memória pelo AutocompleteIndex) ---
+
+    @add_gasto.autocomplete('categoria')
+    @delete_category_cmd.autocomplete('nome')
+    @view_transactions.autocomplete('categoria')
+    @search_transactions.autocomplete('categoria')
+    async def category_autocomplete(self, interaction: discord.Interaction, current: str):
+        if self.autocomplete is None:
+            return []
+        return await self.autocomplete.choices('categoria', interaction, current)
+
+    @add_renda.autocomplete('fonte')
+    async def source_autocomplete(self, interaction: discord.Interaction, current: str):
+        if self.autocomplete is None:
+            return []
+        return await self.autocomplete.choices('fonte', interaction, current)
+
 async def setup(bot):
     await bot.add_cog(Finance(bot))
\ No newline at end of file
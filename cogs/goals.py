@@ -1,19 +1,21 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from utils.db_manager import DBManager # Certifique-se de que a importação está correta
 from datetime import datetime
+from utils.rate_limit import rate_limit
 
 class Goals(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db = DBManager()
+        self.db = bot.db
+        self.autocomplete = getattr(bot, 'autocomplete', None)
 
     @app_commands.command(name="criar_meta", description="Cria uma nova meta financeira.")
     @app_commands.describe(nome="Nome da meta", valor_alvo="Valor total que você deseja alcançar", data_limite="Data limite (DD/MM/AAAA, opcional)")
+    @rate_limit('escrita')
     async def create_goal(self, interaction: discord.Interaction, nome: str, valor_alvo: float, data_limite: str = None):
         await interaction.response.defer()
-        user_obj = self.db.get_or_create_user(str(interaction.user.id)) # Agora retorna o objeto User
+        user_id = await self.db.get_user_id(str(interaction.user.id))
         
         parsed_date = None
         if data_limite:
@@ -23,8 +25,8 @@ class Goals(commands.Cog):
                 await interaction.followup.send("Formato de data inválido. Use DD/MM/AAAA.")
                 return
 
-        goal, message = self.db.create_goal(user_obj, nome, valor_alvo, parsed_date) # Passa o objeto user_obj
-        if goal:
+        goal_id, message = await self.db.create_goal(user_id, nome, valor_alvo, parsed_date)
+        if goal_id:
             await interaction.followup.send(f"Meta '{nome}' de R$ {valor_alvo:,.2f} criada com sucesso!")
         else:
             await interaction.followup.send(f"Erro ao criar meta: {message}")
@@ -32,11 +34,12 @@ class Goals(commands.Cog):
 
     @app_commands.command(name="contribuir_meta", description="Adiciona valor a uma meta existente.")
     @app_commands.describe(id_meta="ID da meta", valor="Valor a adicionar")
+    @rate_limit('escrita')
     async def contribute_goal(self, interaction: discord.Interaction, id_meta: int, valor: float):
         await interaction.response.defer()
-        user_obj = self.db.get_or_create_user(str(interaction.user.id)) # Agora retorna o objeto User
+        user_id = await self.db.get_user_id(str(interaction.user.id))
         
-        success, message = self.db.contribute_to_goal(user_obj, id_meta, valor) # Passa o objeto user_obj
+        success, message = await self.db.contribute_to_goal(user_id, id_meta, valor)
         if success:
             await interaction.followup.send(message)
         else:
@@ -44,11 +47,12 @@ class Goals(commands.Cog):
 
     @app_commands.command(name="concluir_meta", description="Marca uma meta como 100% concluída.")
     @app_commands.describe(id_meta="ID da meta a ser concluída")
+    @rate_limit('escrita')
     async def complete_goal(self, interaction: discord.Interaction, id_meta: int):
         await interaction.response.defer()
-        user_obj = self.db.get_or_create_user(str(interaction.user.id)) # Agora retorna o objeto User
+        user_id = await self.db.get_user_id(str(interaction.user.id))
 
-        success, message = self.db.complete_goal(user_obj, id_meta) # Passa o objeto user_obj
+        success, message = await self.db.complete_goal(user_id, id_meta)
         if success:
             await interaction.followup.send(message)
         else:
@@ -56,15 +60,25 @@ class Goals(commands.Cog):
 
     @app_commands.command(name="deletar_meta", description="Deleta uma meta existente.")
     @app_commands.describe(id_meta="ID da meta a ser deletada")
+    @rate_limit('escrita')
     async def delete_goal(self, interaction: discord.Interaction, id_meta: int):
         await interaction.response.defer()
-        user_obj = self.db.get_or_create_user(str(interaction.user.id)) # Agora retorna o objeto User
+        user_id = await self.db.get_user_id(str(interaction.user.id))
 
-        success, message = self.db.delete_goal(user_obj, id_meta) # Passa o objeto user_obj
+        success, message = await self.db.delete_goal(user_id, id_meta)
         if success:
             await interaction.followup.send(message)
         else:
             await interaction.followup.send(f"Erro: {message}")
 
+    @contribute_goal.autocomplete('id_meta')
+    @complete_goal.autocomplete('id_meta')
+    @delete_goal.autocomplete('id_meta')
+    async def goal_autocomplete(self, interaction: discord.Interaction, current: str):
+        # Sugere as metas pelo nome; a escolha envia o ID
+        if self.autocomplete is None:
+            return []
+        return await self.autocomplete.choices('meta', interaction, current)
+
 async def setup(bot):
     await bot.add_cog(Goals(bot))
\ No newline at end of file
@@ -23,7 +23,10 @@ class Help(commands.Cog):
             "`/add_renda <valor> <fonte> [descricao]` - Registra uma nova renda.",
             "`/add_categoria <nome>` - Adiciona uma nova categoria de gasto.",
             "`/ver_categorias` - Lista todas as suas categorias de gasto.",
-            "`/del_categoria <nome>` - Deleta uma categoria de gasto e suas transações associadas."
+            "`/ver_transacoes [tipo] [categoria] [de] [ate]` - Navega pelas suas transações, página a página.",
+            "`/buscar <termos> [categoria] [de] [ate]` - Busca transações pela descrição (\"frases\" e prefixos com *).",
+            "`/del_categoria <nome>` - Deleta uma categoria de gasto e suas transações associadas (com alguns segundos para desfazer).",
+            "`/importar_extrato <arquivo> [categoria] [fonte]` - Importa transações de um extrato bancário CSV ou OFX."
         )
         embed.add_field(name="💰 Gerenciamento Financeiro", value="\n".join(finance_commands), inline=False)
 
@@ -40,13 +43,18 @@ class Help(commands.Cog):
         reports_commands = (
             "`/resumo_mensal [mes] [ano]` - Exibe um resumo financeiro do mês (e um gráfico de gastos).",
             "`/ver_metas` - Lista todas as suas metas financeiras e progresso.",
-            "`/exportar_pdf [mes] [ano]` - Gera um relatório financeiro detalhado em PDF."
+            "`/exportar_pdf [mes] [ano] [meses]` - Gera um relatório financeiro detalhado em PDF (de um ou vários meses).",
+            "`/tendencia [meses] [mes] [ano]` - Mostra a evolução de renda, gastos e poupança nos últimos meses (até 60), com média móvel e um gráfico."
         )
         embed.add_field(name="📊 Relatórios e Análises", value="\n".join(reports_commands), inline=False)
         
         # Admin (novo cog)
         admin_commands = (
             "`/apagar <quantidade>` - Deleta um número específico de mensagens no canal (máx. 100).",
+            "`/status_db` - Exibe estatísticas do pool de conexões do banco de dados.",
+            "`/status_shards` - Exibe latência, servidores e taxa de interações de cada shard.",
+            "`/metricas` - Exibe latência por comando, tempo no banco, gráficos e filas.",
+            "`/verificar_resumos` - Verifica e repara os totais mensais pré-agregados (só o dono do bot)."
         )
         embed.add_field(name="🛠️ Administração", value="\n".join(admin_commands), inline=False)
 
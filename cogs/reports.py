@@ -1,64 +1,79 @@
 import discord
 from discord.ext import commands
-from discord import app_commands, File
-from utils.db_manager import DBManager # <-- Apenas DBManager é importado agora
-from utils.plot_generator import PlotGenerator
+from discord import app_commands
+from utils.chart_renderer import ChartUnavailable
+from utils.db_manager import add_months, month_range
+from utils.rate_limit import rate_limit
+from utils.report_jobs import ReportQueueFull, ReportResult
 from datetime import datetime
+import asyncio
 import calendar
-import io
-
-# --- Importações para ReportLab ---
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import Paragraph, Spacer, Table, TableStyle 
-from reportlab.lib.utils import ImageReader 
-# --- Fim das Importações para ReportLab ---
+
+TREND_WINDOW = 3 # Meses da média móvel e da comparação por categoria no /tendencia
+
 
 class Reports(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db = DBManager()
-        self.plot_gen = PlotGenerator()
-        self.styles = getSampleStyleSheet()
-        self.styles.add(ParagraphStyle(name='Justify', alignment=1))
+        self.db = bot.db
+        self.charts = bot.charts
+        self.jobs = bot.report_jobs # Fila de relatórios em segundo plano, criada em main.py
+        self.jobs.register('resumo', self._build_monthly_summary)
+        self.jobs.register('pdf', self._build_pdf)
+        self.jobs.register('tendencia', self._build_trend)
+
+    async def _pie_chart(self, data, title, tags=()):
+        """Renderiza o gráfico de pizza fora do event loop; retorna None se o renderizador estiver sobrecarregado."""
+        try:
+            return await self.charts.pie_chart(data, title, tags=tags)
+        except ChartUnavailable:
+            return None
+
+    async def _submit(self, interaction, kind, params):
+        """Envia o relatório para a fila de jobs; o resultado chega como followup da interação."""
+        try:
+            await self.jobs.submit(interaction, kind, params)
+        except ReportQueueFull as e:
+            await interaction.followup.send(str(e))
 
     @app_commands.command(name="resumo_mensal", description="Exibe um resumo financeiro do mês.")
     @app_commands.describe(mes="Mês (ex: 7 para Julho)", ano="Ano (ex: 2024)")
+    @rate_limit('relatorio')
     async def monthly_summary(self, interaction: discord.Interaction, mes: int = None, ano: int = None):
         await interaction.response.defer()
 
-        user_obj = self.db.get_or_create_user(str(interaction.user.id)) # Agora retorna o objeto User
-        
         current_date = datetime.now()
         if mes is None:
             mes = current_date.month
         if ano is None:
             ano = current_date.year
 
-        transactions = self.db.get_transactions_by_month(user_obj, ano, mes) # Passa o objeto user_obj
+        await self._submit(interaction, 'resumo', {'mes': mes, 'ano': ano})
 
-        total_gastos = sum(t.value for t in transactions if t.type == 'gasto')
-        total_renda = sum(t.value for t in transactions if t.type == 'renda')
-        saldo = total_renda - total_gastos
+    async def _build_monthly_summary(self, discord_id, params, progress):
+        """Job 'resumo': monta o embed do resumo mensal e o gráfico de gastos."""
+        mes, ano = params['mes'], params['ano']
+        user_id = await self.db.get_user_id(discord_id)
 
-        gastos_por_categoria = {}
-        for t in transactions:
-            if t.type == 'gasto':
-                gastos_por_categoria[t.category] = gastos_por_categoria.get(t.category, 0) + t.value
-        
-        chart_file = None
+        await progress("Calculando seus totais do mês... 🔢")
+        summary = await self.db.get_monthly_summary(user_id, ano, mes) # Agregado no SQL, sem carregar as transações
+        total_gastos = summary['total_gastos']
+        total_renda = summary['total_renda']
+        saldo = summary['saldo']
+        gastos_por_categoria = summary['gastos_por_categoria']
+
+        files = []
         if gastos_por_categoria:
-            chart_buffer = self.plot_gen.generate_pie_chart(gastos_por_categoria, f"Distribuição de Gastos - {calendar.month_name[mes].capitalize()}/{ano}")
-            chart_file = File(chart_buffer, filename="gastos_por_categoria.png")
+            await progress("Gerando o gráfico de gastos... 📊")
+            chart_png = await self._pie_chart(gastos_por_categoria, f"Distribuição de Gastos - {calendar.month_name[mes].capitalize()}/{ano}", tags=[(user_id, ano, mes)])
+            if chart_png:
+                files.append(("gastos_por_categoria.png", chart_png))
 
-        goals = self.db.get_goals(user_obj) # Passa o objeto user_obj
+        goals = await self.db.get_goals(user_id)
         goals_summary = []
         for goal in goals:
-            progress = (goal.current_value / goal.target_value) * 100 if goal.target_value > 0 else 0
-            status = "Concluída ✅" if progress >= 100 else f"{progress:.1f}% concluído"
+            progress_pct = (goal.current_value / goal.target_value) * 100 if goal.target_value > 0 else 0
+            status = "Concluída ✅" if progress_pct >= 100 else f"{progress_pct:.1f}% concluído"
             goals_summary.append(f"- {goal.name}: {status}")
         
         goals_text = "\n".join(goals_summary) if goals_summary else "Nenhuma meta registrada."
@@ -84,17 +99,102 @@ class Reports(commands.Cog):
 
         embed.set_footer(text="Dados fornecidos pelo seu bot financeiro.")
 
-        if chart_file:
-            await interaction.followup.send(embed=embed, file=chart_file)
-        else:
-            await interaction.followup.send(embed=embed)
+        return ReportResult(embed=embed, files=files)
+
+
+    @app_commands.command(name="tendencia", description="Exibe a evolução de renda, gastos e poupança ao longo de vários meses.")
+    @app_commands.describe(meses="Quantidade de meses (padrão 12, máx. 60)", mes="Mês final (ex: 7 para Julho)", ano="Ano final (ex: 2024)")
+    @rate_limit('relatorio')
+    async def trend(self, interaction: discord.Interaction, meses: app_commands.Range[int, 2, 60] = 12, mes: int = None, ano: int = None):
+        await interaction.response.defer()
+
+        current_date = datetime.now()
+        if mes is None:
+            mes = current_date.month
+        if ano is None:
+            ano = current_date.year
+
+        await self._submit(interaction, 'tendencia', {'mes': mes, 'ano': ano, 'meses': meses})
+
+    async def _build_trend(self, discord_id, params, progress):
+        """Job 'tendencia': séries mensais do período, com média móvel, variações e taxa de poupança."""
+        # O numpy só é importado no primeiro relatório de tendência, não ao carregar o cog
+        from utils.trends import build_trend, category_changes
+
+        mes_final, ano_final, meses = params['mes'], params['ano'], params['meses']
+        ano, mes = add_months(ano_final, mes_final, -(meses - 1))
+        user_id = await self.db.get_user_id(discord_id)
+
+        await progress("Calculando a evolução dos seus totais... 🔢")
+        # Uma consulta para o período inteiro, lida dos totais mensais pré-agregados
+        rows = await self.db.get_monthly_series(user_id, ano, mes, ano_final, mes_final)
+        trend = build_trend(rows, ano, mes, meses, window=TREND_WINDOW)
+        if not trend['renda'].any() and not trend['gastos'].any():
+            return ReportResult(content="Nenhuma transação registrada neste período.")
+
+        labels = trend['meses']
+        periodo = f"{labels[0]} a {labels[-1]}"
+        total_renda = float(trend['renda'].sum())
+        total_gastos = float(trend['gastos'].sum())
+        taxa = f"{(total_renda - total_gastos) / total_renda * 100:.1f}%" if total_renda > 0 else "—"
+
+        embed = discord.Embed(
+            title=f"Tendência Financeira - {periodo}",
+            description=f"Evolução das suas finanças ao longo de {meses} meses.",
+            color=discord.Color.teal()
+        )
+        embed.add_field(name="Renda Média", value=f"R$ {total_renda / meses:,.2f}/mês", inline=True)
+        embed.add_field(name="Gasto Médio", value=f"R$ {total_gastos / meses:,.2f}/mês", inline=True)
+        embed.add_field(name="Taxa de Poupança", value=taxa, inline=True)
+
+        variacao = trend['variacao_gastos'][-1]
+        variacao_str = f" ({variacao:+.1f}% sobre o mês anterior)" if variacao == variacao else "" # NaN sem mês anterior
+        embed.add_field(
+            name="Último Mês",
+            value=(
+                f"Gastos: R$ {trend['gastos'][-1]:,.2f}{variacao_str}\n"
+                f"Média móvel de {TREND_WINDOW} meses: R$ {trend['media_movel_gastos'][-1]:,.2f}"
+            ),
+            inline=False
+        )
+
+        changes = category_changes(trend, window=TREND_WINDOW)
+        if changes:
+            embed.add_field(
+                name=f"Categorias em Alta (últimos {TREND_WINDOW} meses)",
+                value="\n".join(f"- {cat.capitalize()}: R$ {recent:,.2f}/mês (antes R$ {previous:,.2f}/mês)" for cat, recent, previous in changes),
+                inline=False
+            )
+
+        linhas = []
+        for i in range(max(0, meses - 12), meses): # Os 12 meses mais recentes, para caber no embed
+            poupanca = trend['taxa_poupanca'][i]
+            poupanca_str = f"{poupanca:.0f}%" if poupanca == poupanca else "—"
+            linhas.append(f"`{labels[i]}` renda R$ {trend['renda'][i]:,.0f} | gastos R$ {trend['gastos'][i]:,.0f} | poupança {poupanca_str}")
+        embed.add_field(name="Mês a Mês", value="\n".join(linhas), inline=False)
+        embed.set_footer(text="Dados fornecidos pelo seu bot financeiro.")
+
+        files = []
+        await progress("Gerando o gráfico de tendência... 📊")
+        tags = [(user_id, *add_months(ano, mes, i)) for i in range(meses)]
+        try:
+            chart_png = await self.charts.bar_chart_comparison(
+                dict(zip(labels, trend['gastos'].tolist())), f"Gastos Mensais - {periodo}", "Gastos",
+                line=dict(zip(labels, trend['media_movel_gastos'].tolist())), line_label=f"Média móvel ({TREND_WINDOW} meses)",
+                tags=tags,
+            )
+            files.append(("tendencia_gastos.png", chart_png))
+        except ChartUnavailable:
+            pass
+
+        return ReportResult(embed=embed, files=files)
 
 
     @app_commands.command(name="ver_metas", description="Visualiza suas metas financeiras.")
     async def view_goals(self, interaction: discord.Interaction):
         await interaction.response.defer()
-        user_obj = self.db.get_or_create_user(str(interaction.user.id)) # Agora retorna o objeto User
-        goals = self.db.get_goals(user_obj) # Passa o objeto user_obj
+        user_id = await self.db.get_user_id(str(interaction.user.id))
+        goals = await self.db.get_goals(user_id)
 
         if not goals:
             await interaction.followup.send("Você não tem nenhuma meta registrada ainda.")
@@ -127,200 +227,62 @@ class Reports(commands.Cog):
 
 
     @app_commands.command(name="exportar_pdf", description="Gera um relatório financeiro em PDF.")
-    @app_commands.describe(mes="Mês (ex: 7 para Julho)", ano="Ano (ex: 2024)")
-    async def export_pdf(self, interaction: discord.Interaction, mes: int = None, ano: int = None):
+    @app_commands.describe(mes="Mês inicial (ex: 7 para Julho)", ano="Ano inicial (ex: 2024)", meses="Quantidade de meses no relatório (padrão 1, máx. 60)")
+    @rate_limit('relatorio')
+    async def export_pdf(self, interaction: discord.Interaction, mes: int = None, ano: int = None, meses: app_commands.Range[int, 1, 60] = 1):
         await interaction.response.defer()
 
-        user_obj = self.db.get_or_create_user(str(interaction.user.id)) # Agora retorna o objeto User
-        
         current_date = datetime.now()
         if mes is None:
             mes = current_date.month
         if ano is None:
             ano = current_date.year
 
-        transactions = self.db.get_transactions_by_month(user_obj, ano, mes) # Passa o objeto user_obj
-        goals = self.db.get_goals(user_obj) # Passa o objeto user_obj
+        await self._submit(interaction, 'pdf', {'mes': mes, 'ano': ano, 'meses': meses})
+
+    async def _build_pdf(self, discord_id, params, progress):
+        """Job 'pdf': gera o relatório em PDF do período pedido."""
+        mes, ano, meses = params['mes'], params['ano'], params['meses']
+        user_id = await self.db.get_user_id(discord_id)
+
+        ano_final, mes_final = add_months(ano, mes, meses - 1)
+        start_date = month_range(ano, mes)[0]
+        end_date = month_range(ano_final, mes_final)[1]
+        periodo = f"{calendar.month_name[mes].capitalize()}/{ano}"
+        if meses > 1:
+            periodo += f" a {calendar.month_name[mes_final].capitalize()}/{ano_final}"
+
+        await progress("Calculando o resumo do período... 🔢")
+        goals = await self.db.get_goals(user_id)
 
         # --- Cálculos para o Resumo ---
-        total_gastos = sum(t.value for t in transactions if t.type == 'gasto')
-        total_renda = sum(t.value for t in transactions if t.type == 'renda')
-        saldo = total_renda - total_gastos
-
-        gastos_por_categoria = {}
-        for t in transactions:
-            if t.type == 'gasto':
-                gastos_por_categoria[t.category] = gastos_por_categoria.get(t.category, 0) + t.value
-        
+        summary = await self.db.get_period_summary(user_id, ano, mes, ano_final, mes_final)
+
         goals_summary = []
         for goal in goals:
-            progress = (goal.current_value / goal.target_value) * 100 if goal.target_value > 0 else 0
-            status = "Concluída ✅" if progress >= 100 else f"{progress:.1f}%"
+            progress_pct = (goal.current_value / goal.target_value) * 100 if goal.target_value > 0 else 0
+            status = "Concluída ✅" if progress_pct >= 100 else f"{progress_pct:.1f}%"
             goals_summary.append(f"- {goal.name}: {status} (R$ {goal.current_value:,.2f} / R$ {goal.target_value:,.2f})")
         # --- Fim dos Cálculos ---
 
-        # --- Geração do PDF com ReportLab ---
-        buffer = io.BytesIO()
-        c = canvas.Canvas(buffer, pagesize=letter)
-        width, height = letter # Largura e altura da página
-        
-        # Estilos para o PDF
-        styles = getSampleStyleSheet()
-        style_normal = styles['Normal']
-        style_heading1 = styles['h1']
-        style_heading2 = styles['h2']
-        style_body = styles['BodyText']
-
-        y_position = height - inch # Posição inicial
-
-        # Título do Relatório
-        c.setFont("Helvetica-Bold", 18)
-        c.drawString(inch, y_position, f"Relatório Financeiro - {calendar.month_name[mes].capitalize()}/{ano}")
-        y_position -= 0.5 * inch
-
-        # Resumo Financeiro
-        c.setFont("Helvetica-Bold", 14)
-        c.drawString(inch, y_position, "Resumo Financeiro")
-        y_position -= 0.25 * inch
-
-        c.setFont("Helvetica", 12)
-        c.drawString(inch, y_position, f"Renda Total: R$ {total_renda:,.2f}")
-        y_position -= 0.2 * inch
-        c.drawString(inch, y_position, f"Gastos Totais: R$ {total_gastos:,.2f}")
-        y_position -= 0.2 * inch
-        c.drawString(inch, y_position, f"Saldo: R$ {saldo:,.2f}")
-        y_position -= 0.4 * inch # Espaço extra
-
-        # Gastos por Categoria (Texto)
-        c.setFont("Helvetica-Bold", 14)
-        c.drawString(inch, y_position, "Gastos por Categoria")
-        y_position -= 0.25 * inch
+        chart_png = None
+        if summary['gastos_por_categoria']:
+            await progress("Gerando o gráfico de gastos... 📊")
+            tags = [(user_id, *add_months(ano, mes, i)) for i in range(meses)]
+            chart_png = await self._pie_chart(summary['gastos_por_categoria'], f"Distribuição de Gastos - {periodo}", tags=tags)
 
-        if gastos_por_categoria:
-            c.setFont("Helvetica", 12)
-            for cat, val in gastos_por_categoria.items():
-                line = f"- {cat.capitalize()}: R$ {val:,.2f}"
-                c.drawString(inch + 0.2 * inch, y_position, line) # Indentação
-                y_position -= 0.2 * inch
-                if y_position < inch: # Nova página se necessário
-                    c.showPage()
-                    y_position = height - inch
-                    c.setFont("Helvetica", 12) # Resetar fonte na nova página
-        else:
-            c.setFont("Helvetica", 12)
-            c.drawString(inch, y_position, "Nenhum gasto registrado nesta categoria.")
-        y_position -= 0.4 * inch # Espaço extra
-        
-        # --- Adicionar o gráfico de pizza ---
-        if gastos_por_categoria:
-            chart_buffer = self.plot_gen.generate_pie_chart(gastos_por_categoria, f"Distribuição de Gastos - {calendar.month_name[mes].capitalize()}/{ano}")
-            
-            img_reader = ImageReader(chart_buffer)
-            
-            chart_width = 300 
-            chart_height = 300 
-            
-            if y_position < (inch + chart_height + 0.5 * inch): 
-                c.showPage()
-                y_position = height - inch
-            
-            y_position -= chart_height + 0.25 * inch 
-
-            c.drawImage(
-                img_reader, 
-                inch, 
-                y_position, 
-                width=chart_width, 
-                height=chart_height, 
-                preserveAspectRatio=True 
-            )
-            y_position -= 0.4 * inch 
-        else:
-            c.setFont("Helvetica", 12)
-            c.drawString(inch, y_position, "Gráfico de gastos não gerado por falta de dados.")
-            y_position -= 0.4 * inch
-
-        # Progresso de Metas
-        c.setFont("Helvetica-Bold", 14)
-        c.drawString(inch, y_position, "Progresso de Metas")
-        y_position -= 0.25 * inch
-
-        if goals_summary:
-            c.setFont("Helvetica", 12)
-            for goal_line in goals_summary:
-                c.drawString(inch + 0.2 * inch, y_position, goal_line) # Indentação
-                y_position -= 0.2 * inch
-                if y_position < inch: # Nova página se necessário
-                    c.showPage()
-                    y_position = height - inch
-                    c.setFont("Helvetica", 12) # Resetar fonte na nova página
-        else:
-            c.setFont("Helvetica", 12)
-            c.drawString(inch, y_position, "Nenhuma meta registrada.") 
-        y_position -= 0.4 * inch # Espaço extra
+        # O reportlab só é importado no primeiro PDF pedido, não ao carregar o cog
+        from utils.pdf_report import build_report_pdf
 
-        # --- Tabela de Transações Detalhadas ---
-        c.setFont("Helvetica-Bold", 14)
-        c.drawString(inch, y_position, "Detalhes das Transações")
-        y_position -= 0.25 * inch
+        # O PDF é montado fora do event loop, lendo as transações em blocos
+        await progress("Montando o PDF com suas transações... 📄")
+        with self.bot.metrics.time('report_pdf_render_seconds'):
+            buffer = await asyncio.to_thread(
+                build_report_pdf, self.db.sync, user_id, periodo, start_date, end_date, summary, goals_summary, chart_png
+            )
 
-        # Preparar dados para a tabela
-        data = [["Data", "Tipo", "Valor", "Categoria/Fonte", "Descrição"]] # Cabeçalho da tabela
-        
-        if transactions:
-            for t in transactions:
-                type_label = "Gasto" if t.type == 'gasto' else "Renda"
-                category_or_source = t.category if t.type == 'gasto' else t.source if t.source else "N/A"
-                description_text = t.description if t.description else ""
-                
-                data.append([
-                    t.date.strftime('%d/%m/%Y'),
-                    type_label,
-                    f"R$ {t.value:,.2f}",
-                    category_or_source.capitalize(),
-                    description_text
-                ])
-        else:
-            data.append(["", "", "Nenhuma transação detalhada neste período.", "", ""])
-
-        # Definir o estilo da tabela
-        table_style = TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey), # Cabeçalho cinza
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'), 
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#F5F5DC')), # Cor primária
-            ('BACKGROUND', (0, 2), (-1, -1), colors.HexColor('#F8F8F8')), # Cor secundária
-            ('GRID', (0, 0), (-1, -1), 1, colors.black), # Bordas da grade
-            ('BOX', (0, 0), (-1, -1), 1, colors.black), # Borda externa
-        ])
-
-        # Criar a tabela
-        col_widths = [0.8*inch, 0.8*inch, 1.0*inch, 1.2*inch, 2.7*inch] 
-        table = Table(data, colWidths=col_widths) 
-        table.setStyle(table_style)
-
-        # Calcular a altura da tabela para verificar se cabe na página
-        table_width, table_height = table.wrapOn(c, width - 2 * inch, height) 
-
-        # Se não houver espaço suficiente para a tabela, adicione uma nova página
-        if y_position < (inch + table_height + 0.25 * inch): 
-            c.showPage()
-            y_position = height - inch
-            c.setFont("Helvetica-Bold", 14)
-            c.drawString(inch, y_position, "Detalhes das Transações (Continuação)")
-            y_position -= 0.25 * inch
-
-        # Desenhar a tabela
-        table.drawOn(c, inch, y_position - table_height) 
-        y_position -= table_height + 0.4 * inch 
-
-        # Finaliza o PDF
-        c.save()
-        buffer.seek(0)
-        
-        await interaction.followup.send(content="Seu relatório PDF foi gerado!", file=File(buffer, filename=f"relatorio_financeiro_{ano}_{mes}.pdf"))
+        filename = f"relatorio_financeiro_{ano}_{mes}.pdf" if meses == 1 else f"relatorio_financeiro_{ano}_{mes}_a_{ano_final}_{mes_final}.pdf"
+        return ReportResult(content="Seu relatório PDF foi gerado!", files=[(filename, buffer.getvalue())])
         
 
 async def setup(bot):
@@ -1,18 +1,59 @@
+import hashlib
+import json
 import os
 import discord
 from discord.ext import commands
 from dotenv import load_dotenv
+from utils.autocomplete import AutocompleteIndex
+from utils.chart_cache import ChartCache
+from utils.chart_renderer import ChartRenderer
+from utils.db_manager import AsyncDBManager, DBManager
+from utils.metrics import Metrics, MetricsCommandTree, MetricsServer
+from utils.rate_limit import RateLimiter
+from utils.report_jobs import ReportJobQueue
+from utils.shard_stats import ShardStats
+from utils.sql_profiler import SQLProfiler
 
 # Carrega as variáveis de ambiente do arquivo .env
 load_dotenv()
 
-# Configuração do Intents para o bot
-intents = discord.Intents.default()
-intents.message_content = True # Permite que o bot leia o conteúdo das mensagens
-intents.members = True # Necessário para alguns recursos, como obter membros do servidor
+# Configuração do Intents para o bot: só usamos comandos de barra, então não
+# precisamos do conteúdo das mensagens nem da lista de membros (intents
+# privilegiados que mantêm caches grandes em memória)
+intents = discord.Intents.none()
+intents.guilds = True # Canais e guilds, usados pelos comandos e pela entrega de relatórios
+
+
+def parse_shard_ids(value):
+    """Converte '0-3' ou '0,2,4' (ou combinações, como '0-3,8') em uma lista de IDs de shard."""
+    shard_ids = []
+    for part in value.split(','):
+        part = part.strip()
+        if '-' in part:
+            first, last = part.split('-', 1)
+            shard_ids.extend(range(int(first), int(last) + 1))
+        elif part:
+            shard_ids.append(int(part))
+    return shard_ids
+
+
+def shard_settings(environ):
+    """Lê SHARD_COUNT e SHARD_IDS do ambiente.
+
+    Sem nenhuma das duas, o AutoShardedBot usa a quantidade de shards
+    recomendada pelo Discord e abre todos neste processo. Com SHARD_IDS, cada
+    processo abre apenas a sua faixa (por exemplo SHARD_COUNT=8 e SHARD_IDS=0-3
+    em um processo e SHARD_IDS=4-7 em outro).
+    """
+    settings = {}
+    if environ.get('SHARD_COUNT'):
+        settings['shard_count'] = int(environ['SHARD_COUNT'])
+    if environ.get('SHARD_IDS'):
+        if 'shard_count' not in settings:
+            raise ValueError("SHARD_IDS exige SHARD_COUNT com o total de shards de todos os processos.")
+        settings['shard_ids'] = parse_shard_ids(environ['SHARD_IDS'])
+    return settings
 
-# Inicialização do bot
-bot = commands.Bot(command_prefix="!", intents=intents)
 
 # Lista de cogs para carregar
 initial_extensions = [
@@ -23,30 +64,132 @@ initial_extensions = [
     "cogs.admin" # <-- Adicione esta linha
 ]
 
-@bot.event
-async def on_ready():
-    print(f"Bot {bot.user.name}#{bot.user.discriminator} está online e pronto!")
-    print("Tentando carregar cogs...")
-    for extension in initial_extensions:
+# Hash da última árvore de comandos enviada ao Discord (por aplicação)
+COMMAND_TREE_HASH_FILE = os.path.join("database", "command_tree.sha256")
+
+
+def command_tree_hash(tree):
+    """Calcula um hash estável da definição dos comandos de barra globais."""
+    payload = sorted((command.to_dict() for command in tree.get_commands()), key=lambda c: c['name'])
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class FinanceBot(commands.AutoShardedBot):
+    """Bot com a inicialização feita uma única vez em ``setup_hook``.
+
+    O ``on_ready`` dispara de novo a cada reconexão, por isso carregar cogs e
+    sincronizar comandos lá fazia tudo se repetir. O ``setup_hook`` roda uma vez,
+    após o login e antes de conectar ao gateway.
+    """
+
+    metrics_server = None # MetricsServer, quando METRICS_PORT estiver configurado
+
+    async def setup_hook(self):
+        print("Carregando cogs...")
+        for extension in initial_extensions:
+            if extension in self.extensions:
+                continue
+            try:
+                await self.load_extension(extension)
+                print(f"Cog {extension} carregado com sucesso.")
+            except Exception as e:
+                print(f"Falha ao carregar o cog {extension}: {type(e).__name__}: {e}")
+
+        # Inicia os workers de relatórios e reenvia o que ficou pendente antes de um reinício
+        await self.report_jobs.start()
+        self.rate_limiter.start() # Monitor de atraso do event loop, para descartar carga
+
+        await self.sync_commands()
+
+        if self.metrics_server is not None:
+            await self.metrics_server.start()
+
+    async def close(self):
+        if self.metrics_server is not None:
+            await self.metrics_server.stop()
+        await super().close()
+
+    async def sync_commands(self, force=False):
+        """Sincroniza os comandos de barra só quando a árvore mudou desde a última sincronização.
+
+        O endpoint de sincronização tem limite de requisições baixo, então
+        reinícios sem mudança nos comandos não chamam o Discord.
+        """
+        tree_hash = f"{self.application_id}:{command_tree_hash(self.tree)}"
         try:
-            await bot.load_extension(extension)
-            print(f"Cog {extension} carregado com sucesso.")
-        except Exception as e:
-            print(f"Falha ao carregar o cog {extension}: {type(e).__name__}: {e}")
-    print("Cogs carregados (ou tentativa concluída).")
+            with open(COMMAND_TREE_HASH_FILE, encoding='utf-8') as f:
+                synced_hash = f.read().strip()
+        except OSError:
+            synced_hash = None
+        if not force and synced_hash == tree_hash:
+            print("Comandos de barra inalterados; sincronização dispensada.")
+            return None
 
-    # Sincroniza os comandos de barra com o Discord
-    try:
-        synced = await bot.tree.sync()
+        try:
+            synced = await self.tree.sync()
+        except Exception as e:
+            print(f"Falha ao sincronizar comandos de barra: {e}")
+            return None
         print(f"Sincronizados {len(synced)} comandos de barra.")
-    except Exception as e:
-        print(f"Falha ao sincronizar comandos de barra: {e}")
+        os.makedirs(os.path.dirname(COMMAND_TREE_HASH_FILE), exist_ok=True)
+        with open(COMMAND_TREE_HASH_FILE, 'w', encoding='utf-8') as f:
+            f.write(tree_hash)
+        return synced
+
 
-# Obtém o token do Discord das variáveis de ambiente
-discord_token = os.getenv("DISCORD_TOKEN")
+# Inicialização do bot
+bot = FinanceBot(
+    command_prefix=commands.when_mentioned, # Sem prefixo de texto: não lemos o conteúdo das mensagens
+    intents=intents,
+    member_cache_flags=discord.MemberCacheFlags.none(),
+    chunk_guilds_at_startup=False,
+    max_messages=None, # Sem cache de mensagens
+    tree_cls=MetricsCommandTree, # Mede duração, erros e consultas de cada comando
+    **shard_settings(os.environ),
+)
+
+@bot.event
+async def on_shard_ready(shard_id):
+    print(f"Shard {shard_id} conectado ({sum(1 for g in bot.guilds if g.shard_id == shard_id)} servidores).")
+
+@bot.event
+async def on_ready():
+    # Dispara também após reconexões; a inicialização fica no setup_hook
+    print(f"Bot {bot.user.name}#{bot.user.discriminator} está online e pronto! Shards: {bot.shard_ids or list(range(bot.shard_count or 1))} de {bot.shard_count}.")
 
-if discord_token:
-    print("Token do Discord carregado: SIM")
-    bot.run(discord_token)
-else:
-    print("Token do Discord não encontrado. Certifique-se de que DISCORD_TOKEN está configurado no arquivo .env")
\ No newline at end of file
+# Os processos do ChartRenderer importam este módulo ao iniciar, por isso a
+# inicialização do bot só acontece quando ele é executado diretamente.
+if __name__ == "__main__":
+    # Obtém o token do Discord das variáveis de ambiente
+    discord_token = os.getenv("DISCORD_TOKEN")
+
+    if discord_token:
+        print("Token do Discord carregado: SIM")
+        # Serviços únicos do processo, compartilhados por todos os cogs
+        bot.metrics = Metrics()
+        if os.getenv('METRICS_PORT'):
+            bot.metrics_server = MetricsServer(bot.metrics, os.getenv('METRICS_HOST', '127.0.0.1'), int(os.getenv('METRICS_PORT')))
+        bot.db = AsyncDBManager(DBManager.from_env(), metrics=bot.metrics) # DATABASE_URL e DB_POOL_* no .env
+        bot.sql_profiler = SQLProfiler.from_env(bot.metrics) # Só com SQL_PROFILE=1 no .env
+        if bot.sql_profiler is not None:
+            bot.sql_profiler.instrument(bot.db.sync.engine)
+        chart_cache = ChartCache()
+        bot.db.sync.add_listener(chart_cache.on_db_write) # Descarta gráficos de meses alterados
+        bot.charts = ChartRenderer(cache=chart_cache, metrics=bot.metrics)
+        bot.autocomplete = AutocompleteIndex(bot.db, metrics=bot.metrics)
+        bot.db.sync.add_listener(bot.autocomplete.on_db_write) # Mantém categorias, fontes e metas em memória
+        bot.shard_stats = ShardStats(bot)
+        bot.rate_limiter = RateLimiter.from_env(bot) # RATE_LIMIT_*, MAX_CONCURRENT_IMPORTS e LOOP_LAG_SHED_MS no .env
+        # Cada processo retoma apenas os relatórios que ele mesmo enfileirou
+        bot.report_jobs = ReportJobQueue(
+            bot,
+            worker_id=f"shards:{os.getenv('SHARD_IDS')}" if os.getenv('SHARD_IDS') else 'default',
+            max_pending=int(os.getenv('MAX_PENDING_REPORTS', 20)),
+        )
+        try:
+            bot.run(discord_token)
+        finally:
+            bot.charts.close()
+            bot.db.close()
+    else:
+        print("Token do Discord não encontrado. Certifique-se de que DISCORD_TOKEN está configurado no arquivo .env")
@@ -0,0 +1,202 @@
+import asyncio
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+
+from discord import app_commands
+
+from utils.cache import LRUCache
+
+MAX_CHOICES = 25 # Limite do Discord por resposta de autocomplete
+MAX_VALUE_LENGTH = 100 # Limite do Discord para o valor de uma escolha
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def normalize(text):
+    """Chave de busca: minúsculas e sem acentos."""
+    decomposed = unicodedata.normalize('NFKD', str(text).lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+class PrefixIndex:
+    """Nomes de um tipo (categorias, fontes ou metas) de um usuário, ordenados pela chave de busca.
+
+    Cada item é (chave, nome exibido, valor da escolha); a busca por prefixo é uma
+    bisseção na lista ordenada e, se sobrar espaço, completa com os nomes que
+    contêm o texto em outra posição. Nomes longos demais para o valor de uma
+    escolha ficam de fora: o Discord recusaria a resposta inteira, e cortá-los
+    mudaria o nome enviado ao comando.
+    """
+
+    def __init__(self, items=()):
+        self._items = sorted(item for item in items if self._fits(item[2]))
+        self._keys = [item[0] for item in self._items]
+
+    @staticmethod
+    def _fits(value):
+        return not isinstance(value, str) or len(value) <= MAX_VALUE_LENGTH
+
+    def add(self, key, name, value):
+        self.remove(value)
+        if not self._fits(value):
+            return
+        index = bisect_left(self._items, (key, name, value))
+        self._items.insert(index, (key, name, value))
+        self._keys.insert(index, key)
+
+    def remove(self, value):
+        for index, item in enumerate(self._items):
+            if item[2] == value:
+                del self._items[index]
+                del self._keys[index]
+                return
+
+    def search(self, text, limit=MAX_CHOICES):
+        prefix = normalize(text).strip()
+        start = bisect_left(self._keys, prefix)
+        found = []
+        for key, name, value in self._items[start:]:
+            if not key.startswith(prefix) or len(found) >= limit:
+                break
+            found.append((name, value))
+        if prefix and len(found) < limit:
+            for key, name, value in self._items:
+                if prefix in key and not key.startswith(prefix):
+                    found.append((name, value))
+                    if len(found) >= limit:
+                        break
+        return found
+
+
+class _UserEntry:
+    """Índices de um usuário. Enquanto ``ready`` é falso, as escritas que chegam são guardadas
+    para serem aplicadas sobre os nomes lidos do banco, que podem ser anteriores a elas."""
+
+    def __init__(self):
+        self.indexes = {'categoria': PrefixIndex(), 'fonte': PrefixIndex(), 'meta': PrefixIndex()}
+        self.ready = False
+        self.pending = []
+
+
+class AutocompleteIndex:
+    """Autocomplete de categorias, fontes de renda e metas, servido da memória.
+
+    Os nomes de cada usuário são carregados do banco uma vez (get_categories,
+    get_income_sources e get_goals) e depois mantidos pelos eventos de escrita do
+    DBManager (registre ``on_db_write`` com ``add_listener``). Com o usuário em
+    memória, a resposta não consulta o banco. Para um usuário ainda não
+    carregado, espera o carregamento por até ``warm_timeout`` segundos e, se
+    ele demorar mais, responde sem sugestões para não perder o prazo de 3s do
+    Discord; o carregamento continua e serve as próximas teclas.
+    """
+
+    def __init__(self, db, max_users=10000, warm_timeout=1.0, metrics=None):
+        self.db = db # AsyncDBManager
+        self.warm_timeout = warm_timeout
+        self.metrics = metrics
+        self._users = LRUCache(maxsize=max_users) # user_id -> _UserEntry
+        self._loading = {} # discord_id -> task de carregamento
+        self._lock = threading.Lock() # Os eventos de escrita chegam nas threads do banco
+
+    # --- Carregamento ---
+
+    def _load(self, discord_id):
+        task = self._loading.get(discord_id)
+        if task is None:
+            task = asyncio.create_task(self._warm(discord_id))
+            self._loading[discord_id] = task
+            task.add_done_callback(lambda done: self._loaded(discord_id, done))
+        return task
+
+    def _loaded(self, discord_id, task):
+        self._loading.pop(discord_id, None)
+        if not task.cancelled() and task.exception() is not None:
+            # Quem pediu pode já ter desistido por causa do prazo; a próxima tecla tenta de novo
+            print(f"Erro ao carregar o autocomplete de {discord_id}: {task.exception()!r}")
+
+    async def _warm(self, discord_id):
+        user_id = await self.db.get_user_id(discord_id)
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                entry = _UserEntry()
+                self._users.set(user_id, entry)
+            elif entry.ready:
+                return entry
+        try:
+            categories, sources, goals = await asyncio.gather(
+                self.db.get_categories(user_id), self.db.get_income_sources(user_id), self.db.get_goals(user_id),
+            )
+        except BaseException:
+            self._users.pop(user_id)
+            raise
+        with self._lock:
+            entry.indexes['categoria'] = PrefixIndex((normalize(row.name), row.name, row.name) for row in categories)
+            entry.indexes['fonte'] = PrefixIndex((normalize(name), name, name) for name in sources)
+            entry.indexes['meta'] = PrefixIndex(self._goal_item(row.id, row.name) for row in goals)
+            for event, info in entry.pending:
+                self._apply(entry, event, info)
+            entry.pending = []
+            entry.ready = True
+        return entry
+
+    @staticmethod
+    def _goal_item(goal_id, name):
+        # A meta é encontrada pelo nome ou, em qualquer posição da chave, pelo ID digitado
+        return f"{normalize(name)} #{goal_id}", f"{name} (ID: {goal_id})"[:100], goal_id
+
+    # --- Atualização pelas escritas ---
+
+    def on_db_write(self, event, user_id, added=(), removed=(), **info):
+        """Listener do DBManager: aplica as categorias, fontes e metas criadas ou removidas."""
+        if event not in ('categories', 'sources', 'goals'):
+            return
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                return # Usuário fora da memória: será lido do banco quando for preciso
+            if entry.ready:
+                self._apply(entry, event, {'added': added, 'removed': removed})
+            else:
+                entry.pending.append((event, {'added': added, 'removed': removed}))
+
+    def _apply(self, entry, event, info):
+        if event == 'goals':
+            index = entry.indexes['meta']
+            for goal_id, name in info['added']:
+                index.add(*self._goal_item(goal_id, name))
+            for goal_id in info['removed']:
+                index.remove(goal_id)
+            return
+        index = entry.indexes['categoria' if event == 'categories' else 'fonte']
+        for name in info['added']:
+            index.add(normalize(name), name, name)
+        for name in info['removed']:
+            index.remove(name)
+
+    # --- Consulta ---
+
+    async def choices(self, kind, interaction, current):
+        """Sugestões para o argumento do tipo ``kind`` ('categoria', 'fonte' ou 'meta')."""
+        started = time.perf_counter()
+        discord_id = str(interaction.user.id)
+        user_id = self.db.sync.cached_user_id(discord_id)
+        entry = self._users.get(user_id) if user_id is not None else None
+        if entry is None or not entry.ready:
+            try:
+                entry = await asyncio.wait_for(asyncio.shield(self._load(discord_id)), self.warm_timeout)
+                result = 'carregado'
+            except asyncio.TimeoutError:
+                entry = None
+                result = 'expirou'
+            except Exception:
+                entry = None # Erro do banco; já registrado por _loaded, e a próxima tecla tenta de novo
+                result = 'erro'
+            if self.metrics is not None:
+                self.metrics.inc('autocomplete_cold_total', kind=kind, result=result)
+
+        found = entry.indexes[kind].search(current) if entry is not None else []
+        if self.metrics is not None:
+            self.metrics.observe('autocomplete_seconds', time.perf_counter() - started, buckets=LATENCY_BUCKETS, kind=kind)
+        return [app_commands.Choice(name=str(name)[:100], value=value) for name, value in found]
@@ -0,0 +1,123 @@
+import asyncio
+import time
+
+import discord
+
+UNDO_SECONDS = 15 # Janela para desfazer o /del_categoria antes de apagar qualquer coisa
+BATCH_SIZE = 500 # Transações apagadas por commit
+BATCH_PAUSE = 0.05 # Pausa entre os lotes, para as escritas dos outros usuários passarem
+PROGRESS_INTERVAL = 2.0 # Intervalo mínimo entre as atualizações da mensagem de progresso
+
+
+class UndoView(discord.ui.View):
+    """Botão 'Desfazer' da exclusão de categoria; o CategoryDeleter encerra a view no fim da janela."""
+
+    def __init__(self, owner_id):
+        super().__init__(timeout=None)
+        self.owner_id = owner_id
+        self.undone = False
+
+    async def interaction_check(self, interaction):
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message("Só quem pediu a exclusão pode desfazê-la.", ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(label="Desfazer", emoji="↩️", style=discord.ButtonStyle.secondary)
+    async def undo(self, interaction, button):
+        self.undone = True
+        self.stop()
+        await interaction.response.edit_message(content="Exclusão cancelada. Nada foi apagado. 👍", view=None)
+
+
+class CategoryDeleter:
+    """Exclusão de categorias em segundo plano, em lotes curtos.
+
+    Depois da janela de ``undo_seconds`` (durante a qual nada é apagado e o
+    usuário pode desfazer), as transações são apagadas em lotes de
+    ``batch_size``, cada um no seu próprio commit e com uma pausa entre eles,
+    para não segurar o lock de escrita do SQLite. O progresso é mostrado na
+    mensagem do comando.
+    """
+
+    def __init__(self, db, undo_seconds=UNDO_SECONDS, batch_size=BATCH_SIZE, pause=BATCH_PAUSE, max_concurrent=2):
+        self.db = db # AsyncDBManager
+        self.undo_seconds = undo_seconds
+        self.batch_size = batch_size
+        self.pause = pause
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._tasks = {} # (user_id, nome) -> task da exclusão
+
+    async def start(self, interaction, user_id, name):
+        """Mostra o aviso com o botão de desfazer e agenda a exclusão; retorna sem esperar por ela.
+
+        Retorna False, sem fazer nada, se a categoria já está sendo apagada.
+        """
+        name = name.lower()
+        key = (user_id, name)
+        if key in self._tasks:
+            return False
+        self._tasks[key] = None # Reservada antes do primeiro await, para um segundo comando não começar junto
+        try:
+            total = await self.db.count_category_transactions(user_id, name)
+            view = UndoView(interaction.user.id)
+            await interaction.followup.send(
+                f"A categoria '{name}' e suas {total:,} transações serão apagadas em {self.undo_seconds}s. "
+                "Clique em Desfazer para cancelar.",
+                view=view,
+            )
+        except BaseException:
+            self._tasks.pop(key, None)
+            raise
+        task = asyncio.create_task(self._run(interaction, user_id, name, total, view))
+        self._tasks[key] = task
+        task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        return True
+
+    async def _edit(self, interaction, content):
+        try:
+            await interaction.edit_original_response(content=content, view=None)
+        except discord.HTTPException:
+            pass # Mensagem apagada ou token da interação expirado; a exclusão continua
+
+    async def _run(self, interaction, user_id, name, total, view):
+        try:
+            await asyncio.wait_for(view.wait(), self.undo_seconds)
+        except asyncio.TimeoutError:
+            view.stop() # Fim da janela: o botão deixa de responder
+        if view.undone:
+            return
+
+        deleted = 0
+        try:
+            async with self._semaphore:
+                await self._edit(interaction, f"Apagando a categoria '{name}'... 0 de {total:,} transações. 🗑️")
+                # Só as transações que já existiam; gastos novos na categoria não entram na exclusão
+                last_id = await self.db.last_transaction_id()
+                last_update = time.monotonic()
+                while True:
+                    count = await self.db.delete_category_batch(user_id, name, last_id, self.batch_size)
+                    if not count:
+                        break
+                    deleted += count
+                    if time.monotonic() - last_update >= PROGRESS_INTERVAL:
+                        last_update = time.monotonic()
+                        percent = deleted / total * 100 if total else 100
+                        await self._edit(interaction, f"Apagando a categoria '{name}'... {deleted:,} de {total:,} transações ({percent:.0f}%). 🗑️")
+                    await asyncio.sleep(self.pause)
+                removed = await self.db.finish_category_delete(user_id, name)
+        except Exception as e:
+            print(f"Erro ao apagar a categoria '{name}' do usuário {user_id}: {e!r}")
+            await self._edit(interaction, f"Erro ao apagar a categoria '{name}' depois de {deleted:,} transações. Use /del_categoria de novo para continuar.")
+            return
+
+        if removed:
+            await self._edit(interaction, f"Categoria '{name}' e suas {deleted:,} transações associadas deletadas com sucesso.")
+        else:
+            await self._edit(interaction, f"{deleted:,} transações da categoria '{name}' deletadas; ela foi mantida com os gastos registrados durante a exclusão.")
+
+    def close(self):
+        """Cancela as exclusões em andamento (o que já foi apagado continua consistente)."""
+        for task in list(self._tasks.values()):
+            if task is not None:
+                task.cancel()
@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+class ChartCache:
+    """Cache de gráficos endereçado por conteúdo, em memória e em disco, com despejo LRU.
+
+    A chave é o hash dos dados, do título e dos parâmetros de renderização, então
+    uma entrada nunca fica desatualizada: se os dados mudam, a chave muda. As
+    etiquetas (user_id, ano, mês) servem apenas para liberar logo o espaço das
+    entradas de um mês que acabou de receber uma escrita.
+    """
+
+    def __init__(self, directory='database/chart_cache', max_memory_bytes=16 * 1024 * 1024, max_disk_bytes=128 * 1024 * 1024):
+        self.directory = directory
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict() # chave -> bytes do PNG
+        self._memory_bytes = 0
+        self._disk = OrderedDict() # chave -> tamanho do arquivo
+        self._disk_bytes = 0
+        self._tags = {} # user_id -> {(ano, mês) -> conjunto de chaves}
+        self._key_tags = {} # chave -> etiquetas (user_id, ano, mês), para tirá-la de _tags quando sair do cache
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._load_disk_index()
+
+    def _load_disk_index(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.png'):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+        self._evict_disk()
+
+    @staticmethod
+    def make_key(kind, args, kwargs):
+        """Gera a chave do gráfico a partir do tipo, dos argumentos e dos parâmetros."""
+        payload = json.dumps([kind, args, kwargs], default=str, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.png")
+
+    def get_memory(self, key):
+        """Retorna o PNG se ele estiver na memória, sem tocar no disco (seguro no event loop), ou None."""
+        with self._lock:
+            png = self._memory.get(key)
+            if png is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+            return png
+
+    def get(self, key):
+        """Retorna os bytes do PNG em cache, ou None. Pode ler o disco: fora do event loop, use uma thread."""
+        with self._lock:
+            png = self._memory.get(key)
+            if png is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return png
+            if key not in self._disk:
+                self.misses += 1
+                return None
+            self._disk.move_to_end(key)
+
+        try:
+            with open(self._path(key), 'rb') as f:
+                png = f.read()
+            os.utime(self._path(key)) # Mantém a ordem LRU entre reinícios
+        except OSError:
+            with self._lock:
+                self._disk_bytes -= self._disk.pop(key, 0)
+                self._release(key)
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+            self._store_memory(key, png)
+        return png
+
+    def put(self, key, png, tags=()):
+        """Guarda um PNG renderizado, associado às etiquetas (user_id, ano, mês) informadas. Grava no disco."""
+        with self._lock:
+            for user_id, year, month in tags:
+                self._tags.setdefault(user_id, {}).setdefault((year, month), set()).add(key)
+                self._key_tags.setdefault(key, set()).add((user_id, year, month))
+            self._store_memory(key, png)
+            if not self.directory or key in self._disk or len(png) > self.max_disk_bytes:
+                self._release(key) # Sem espaço na memória nem no disco, a chave sai das etiquetas
+                return
+            self._disk[key] = len(png)
+            self._disk_bytes += len(png)
+
+        try:
+            tmp_path = self._path(key) + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(png)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            with self._lock:
+                self._disk_bytes -= self._disk.pop(key, 0)
+                self._release(key)
+            return
+
+        with self._lock:
+            self._evict_disk()
+
+    def _store_memory(self, key, png):
+        if len(png) > self.max_memory_bytes:
+            return
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = png
+        self._memory_bytes += len(png)
+        while self._memory_bytes > self.max_memory_bytes:
+            old_key, old = self._memory.popitem(last=False)
+            self._memory_bytes -= len(old)
+            self._release(old_key)
+
+    def _evict_disk(self):
+        while self._disk_bytes > self.max_disk_bytes:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self._remove_file(key)
+            self._release(key)
+
+    def _release(self, key):
+        """Tira a chave das etiquetas quando ela não está mais nem na memória nem no disco."""
+        if key in self._memory or key in self._disk:
+            return
+        for user_id, year, month in self._key_tags.pop(key, ()):
+            months = self._tags.get(user_id, {})
+            keys = months.get((year, month), set())
+            keys.discard(key)
+            if not keys:
+                months.pop((year, month), None)
+            if not months:
+                self._tags.pop(user_id, None)
+
+    def _remove_file(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def invalidate(self, user_id, year=None, month=None):
+        """Remove as entradas de um mês do usuário (ou de todos os meses, se year/month forem None)."""
+        with self._lock:
+            months = self._tags.get(user_id)
+            if not months:
+                return
+            keys = set()
+            for tag in (list(months) if year is None else [(year, month)]):
+                keys |= months.pop(tag, set())
+            if not months:
+                del self._tags[user_id]
+            for key in keys:
+                png = self._memory.pop(key, None)
+                if png is not None:
+                    self._memory_bytes -= len(png)
+                if key in self._disk:
+                    self._disk_bytes -= self._disk.pop(key)
+                    self._remove_file(key)
+                self._release(key) # Remove também as etiquetas de outros meses do gráfico
+
+    def on_db_write(self, event, user_id, months=None, **info):
+        """Listener do DBManager: descarta os gráficos dos meses alterados."""
+        if event != 'transactions':
+            return
+        if months is None:
+            self.invalidate(user_id)
+        else:
+            for year, month in months:
+                self.invalidate(user_id, year, month)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'disk_entries': len(self._disk),
+                'disk_bytes': self._disk_bytes,
+            }
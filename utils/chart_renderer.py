@@ -0,0 +1,146 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Funções de utils.plot_generator por tipo de gráfico. O módulo (e com ele o
+# matplotlib) só é importado nos processos do pool, nunca no processo do bot.
+RENDERERS = {
+    'pie': 'render_pie_chart',
+    'bar': 'render_bar_chart_comparison',
+}
+
+
+class ChartUnavailable(Exception):
+    """O gráfico não pôde ser renderizado (fila cheia, tempo esgotado ou processo perdido)."""
+
+
+class ChartQueueFull(ChartUnavailable):
+    """Há gráficos demais aguardando renderização."""
+
+
+def _init_worker():
+    # Importa o matplotlib e aquece o cache de fontes antes do primeiro pedido real
+    from utils import plot_generator
+    plot_generator.render_pie_chart({'': 1}, '', figsize=(1, 1), dpi=10)
+
+
+def _render_chart(kind, *args, **kwargs):
+    from utils import plot_generator
+    return getattr(plot_generator, RENDERERS[kind])(*args, **kwargs)
+
+
+def _warm_up():
+    return True
+
+
+class ChartRenderer:
+    """Renderiza gráficos em um pool de processos, fora do event loop.
+
+    Os processos são iniciados com o matplotlib já importado. ``max_pending``
+    limita quantos gráficos podem estar na fila ou em execução ao mesmo tempo, e
+    cada pedido falha com ``ChartUnavailable`` após ``timeout`` segundos. Com um
+    ``ChartCache``, gráficos já renderizados são devolvidos sem passar pelo pool.
+    Com um ``Metrics``, registra o tempo de renderização, os acertos do cache e as falhas.
+    """
+
+    def __init__(self, workers=2, max_pending=8, timeout=20.0, cache=None, metrics=None):
+        self.cache = cache
+        self.metrics = metrics
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.pending = 0
+        self._executor = self._create_executor()
+        if metrics is not None:
+            metrics.gauge('chart_queue_depth', lambda: self.pending)
+
+    def _create_executor(self):
+        # 'spawn' evita herdar as threads do processo do bot (como aconteceria com fork)
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+        )
+        for _ in range(self.workers):
+            executor.submit(_warm_up)
+        return executor
+
+    async def render(self, kind, *args, tags=(), **kwargs):
+        """Renderiza um gráfico do tipo ``kind`` e retorna os bytes do PNG.
+
+        ``tags`` são as etiquetas (user_id, ano, mês) dos dados usados, para invalidação do cache.
+        """
+        key = None
+        if self.cache is not None:
+            key = self.cache.make_key(kind, args, kwargs)
+            # Só a camada em memória é lida no event loop; o disco é lido numa thread
+            png = self.cache.get_memory(key)
+            if png is None:
+                png = await asyncio.to_thread(self.cache.get, key)
+            if png is not None:
+                if self.metrics is not None:
+                    self.metrics.inc('chart_cache_hits_total', kind=kind)
+                return png
+
+        started = time.perf_counter()
+        try:
+            png = await self._render(kind, *args, **kwargs)
+        except ChartUnavailable as e:
+            if self.metrics is not None:
+                self.metrics.inc('chart_failures_total', kind=kind, reason=type(e).__name__)
+            raise
+        if self.metrics is not None:
+            self.metrics.observe('chart_render_seconds', time.perf_counter() - started, kind=kind)
+        if key is not None:
+            await asyncio.to_thread(self.cache.put, key, png, tags)
+        return png
+
+    async def _render(self, kind, *args, **kwargs):
+        if self.pending >= self.max_pending:
+            raise ChartQueueFull(f"{self.pending} gráficos já estão na fila.")
+        if kind not in RENDERERS:
+            raise ValueError(f"Tipo de gráfico desconhecido: {kind}")
+
+        try:
+            future = self._executor.submit(_render_chart, kind, *args, **kwargs)
+        except BrokenProcessPool:
+            self._restart_executor()
+            raise ChartUnavailable("O processo de renderização foi encerrado.")
+        # A vaga só é liberada quando o processo termina o gráfico: depois do tempo
+        # esgotado, o pedido desiste, mas o gráfico continua ocupando o pool
+        self.pending += 1
+        loop = asyncio.get_running_loop()
+
+        def release(_):
+            try:
+                loop.call_soon_threadsafe(self._release_slot)
+            except RuntimeError:
+                pass # Event loop já encerrado
+
+        future.add_done_callback(release)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            raise ChartUnavailable(f"Renderização excedeu {self.timeout:.0f}s.")
+        except BrokenProcessPool:
+            self._restart_executor()
+            raise ChartUnavailable("O processo de renderização foi encerrado.")
+
+    def _release_slot(self):
+        self.pending -= 1
+
+    def _restart_executor(self):
+        # Um processo morreu; recria o pool para os próximos pedidos
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = self._create_executor()
+
+    async def pie_chart(self, data: dict, title: str, tags=()) -> bytes:
+        return await self.render('pie', data, title, tags=tags)
+
+    async def bar_chart_comparison(self, data: dict, title: str, ylabel: str, line: dict = None, line_label: str = None, tags=()) -> bytes:
+        return await self.render('bar', data, title, ylabel, line=line, line_label=line_label, tags=tags)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
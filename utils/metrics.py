@@ -0,0 +1,325 @@
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+
+import discord
+from aiohttp import web
+from discord import app_commands
+from sqlalchemy import event
+
+from utils.rate_limit import RateLimited
+
+PREFIX = 'financebot_'
+
+# Métricas conhecidas: nome -> (tipo, descrição). Os nomes são expostos com PREFIX.
+METRICS = {
+    'command_duration_seconds': ('histogram', "Duração dos comandos de barra, do recebimento à conclusão."),
+    'command_errors_total': ('counter', "Comandos de barra que terminaram com erro."),
+    'command_db_queries': ('histogram', "Consultas SQL executadas por comando ou relatório."),
+    'db_call_duration_seconds': ('histogram', "Duração das chamadas ao DBManager, incluindo a espera no pool de threads."),
+    'db_call_errors_total': ('counter', "Chamadas ao DBManager que levantaram exceção."),
+    'db_queries_total': ('counter', "Consultas SQL executadas."),
+    'db_slow_queries_total': ('counter', "Consultas SQL acima do limite do SQLProfiler."),
+    'rate_limited_total': ('counter', "Comandos recusados pelo RateLimiter, por orçamento e motivo."),
+    'event_loop_lag_seconds': ('gauge', "Atraso recente do event loop, usado para descartar carga."),
+    'db_repeated_statements_total': ('counter', "Consultas repetidas dentro de um mesmo comando (possível N+1), detectadas pelo SQLProfiler."),
+    'chart_render_seconds': ('histogram', "Duração da renderização de gráficos no pool de processos."),
+    'chart_cache_hits_total': ('counter', "Gráficos servidos pelo cache, sem renderizar."),
+    'chart_failures_total': ('counter', "Gráficos que não puderam ser renderizados."),
+    'report_build_seconds': ('histogram', "Duração da geração de relatórios em segundo plano."),
+    'report_pdf_render_seconds': ('histogram', "Duração da montagem do PDF com o ReportLab."),
+    'report_upload_seconds': ('histogram', "Duração da entrega do relatório ao Discord."),
+    'report_failures_total': ('counter', "Relatórios que falharam."),
+    'chart_queue_depth': ('gauge', "Gráficos na fila ou em renderização."),
+    'report_queue_depth': ('gauge', "Relatórios aguardando um worker."),
+    'write_queue_depth': ('gauge', "Escritas aguardando o próximo commit agrupado."),
+    'db_connections_in_use': ('gauge', "Conexões do pool em uso."),
+    'autocomplete_seconds': ('histogram', "Tempo de resposta do autocomplete, por tipo de argumento."),
+    'autocomplete_cold_total': ('counter', "Autocompletes de usuários ainda fora da memória, por resultado do carregamento."),
+}
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+# Escopo (comando ou relatório) em andamento na tarefa atual; é copiado para as
+# threads do banco por AsyncDBManager.run, o que permite contar as consultas de cada um
+_current_scope = contextvars.ContextVar('metrics_scope', default=None)
+
+
+class Histogram:
+    """Histograma com limites fixos (como os do Prometheus: cada balde conta valores <= limite)."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1) # O último é o +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Estima o quantil ``q`` interpolando dentro do balde, como o histogram_quantile do Prometheus."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                if index == len(self.buckets):
+                    return self.buckets[-1] # Acima do último limite não há como interpolar
+                lower = self.buckets[index - 1] if index else 0
+                return lower + (self.buckets[index] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+
+class _Scope:
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.statements = Counter() # (sql, parâmetros) -> execuções; preenchido pelo SQLProfiler
+
+
+def current_scope():
+    """Retorna o escopo (comando ou relatório) em andamento na tarefa ou thread atual, ou None."""
+    return _current_scope.get()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+def _format_number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """Registro de métricas do processo: contadores, histogramas e medidores.
+
+    É compartilhado pelo bot, pelo banco e pelos renderizadores. As leituras são
+    baratas e seguras a partir de qualquer thread; ``render`` produz o formato
+    texto do Prometheus servido pelo ``MetricsServer``.
+    """
+
+    def __init__(self):
+        self._counters = {} # (nome, rótulos) -> valor
+        self._histograms = {} # (nome, rótulos) -> Histogram
+        self._gauges = {} # nome -> função sem argumentos
+        self._scope_listeners = []
+        self._lock = threading.Lock()
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def gauge(self, name, func):
+        """Registra um medidor cujo valor é lido de ``func()`` a cada coleta."""
+        self._gauges[name] = func
+
+    @contextmanager
+    def time(self, name, **labels):
+        """Mede a duração do bloco e a registra no histograma ``name``."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def counters(self, name):
+        """Retorna {rótulos: valor} do contador ``name`` (rótulos como tuplas ordenadas)."""
+        with self._lock:
+            return {labels: value for (n, labels), value in self._counters.items() if n == name}
+
+    def histograms(self, name):
+        """Retorna {rótulos: Histogram} do histograma ``name`` (rótulos como tuplas ordenadas)."""
+        with self._lock:
+            return {labels: histogram for (n, labels), histogram in self._histograms.items() if n == name}
+
+    def gauge_values(self):
+        values = {}
+        for name, func in self._gauges.items():
+            try:
+                values[name] = func()
+            except Exception:
+                values[name] = None
+        return values
+
+    # --- Escopos: consultas e duração de cada comando ou relatório ---
+
+    def add_scope_listener(self, callback):
+        """Registra ``callback(scope)``, chamado quando um escopo é encerrado."""
+        self._scope_listeners.append(callback)
+
+    def open_scope(self, name):
+        """Abre um escopo na tarefa atual; as consultas feitas a partir dela passam a ser contadas nele."""
+        scope = _Scope(name)
+        _current_scope.set(scope)
+        return scope
+
+    def close_scope(self, scope, duration_metric=None, **labels):
+        """Registra as consultas (e, se pedido, a duração) de um escopo aberto com ``open_scope``."""
+        if duration_metric is not None:
+            self.observe(duration_metric, time.perf_counter() - scope.started, **labels)
+        self.observe('command_db_queries', scope.queries, buckets=QUERY_BUCKETS, command=scope.name)
+        for callback in self._scope_listeners:
+            callback(scope)
+
+    @contextmanager
+    def scope(self, name):
+        """Como ``open_scope``/``close_scope``, para um bloco (restaura o escopo anterior ao sair)."""
+        scope = _Scope(name)
+        token = _current_scope.set(scope)
+        try:
+            yield scope
+        finally:
+            _current_scope.reset(token)
+            self.close_scope(scope)
+
+    def instrument_engine(self, engine):
+        """Conta as consultas SQL do engine, no total e por escopo."""
+        event.listen(engine, 'before_cursor_execute', self._on_query)
+
+    def _on_query(self, conn, cursor, statement, parameters, context, executemany):
+        self.inc('db_queries_total')
+        scope = _current_scope.get()
+        if scope is not None:
+            scope.queries += 1
+
+    # --- Exposição ---
+
+    def render(self):
+        """Gera o texto no formato de exposição do Prometheus."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                ((key, (histogram.buckets, list(histogram.counts), histogram.sum, histogram.count))
+                 for key, histogram in self._histograms.items()),
+                key=lambda item: item[0],
+            )
+        lines = []
+        described = set()
+
+        def describe(name, kind):
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {PREFIX}{name} {METRICS.get(name, (kind, name))[1]}")
+                lines.append(f"# TYPE {PREFIX}{name} {kind}")
+
+        for (name, labels), value in counters:
+            describe(name, 'counter')
+            lines.append(f"{PREFIX}{name}{_format_labels(labels)} {_format_number(value)}")
+
+        for (name, labels), (buckets, counts, total, count) in histograms:
+            describe(name, 'histogram')
+            cumulative = 0
+            for bound, bucket_count in zip(buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                lines.append(f"{PREFIX}{name}_bucket{_format_labels(labels + (('le', _format_number(float(bound))),))} {cumulative}")
+            lines.append(f"{PREFIX}{name}_sum{_format_labels(labels)} {_format_number(total)}")
+            lines.append(f"{PREFIX}{name}_count{_format_labels(labels)} {count}")
+
+        for name, value in sorted(self.gauge_values().items()):
+            if value is None:
+                continue
+            describe(name, 'gauge')
+            lines.append(f"{PREFIX}{name} {_format_number(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+class MetricsCommandTree(app_commands.CommandTree):
+    """CommandTree que mede a duração, os erros e as consultas SQL de cada comando de barra.
+
+    Usa o ``Metrics`` em ``client.metrics``. O escopo é aberto no
+    ``interaction_check``, que roda na mesma tarefa do comando. Em caso de erro,
+    emite o evento ``app_command_error``.
+    """
+
+    def __init__(self, client, **kwargs):
+        super().__init__(client, **kwargs)
+        client.add_listener(self._on_completion, 'on_app_command_completion')
+
+    def _metrics(self):
+        return getattr(self.client, 'metrics', None)
+
+    async def interaction_check(self, interaction):
+        metrics = self._metrics()
+        if metrics is not None and interaction.type is discord.InteractionType.application_command:
+            interaction.extras['metrics_scope'] = metrics.open_scope(interaction.data.get('name', '?'))
+        return True
+
+    def _finish(self, interaction, command, error=None):
+        metrics = self._metrics()
+        scope = interaction.extras.pop('metrics_scope', None)
+        if metrics is None or scope is None:
+            return
+        name = command.qualified_name if command is not None else scope.name
+        scope.name = name
+        metrics.close_scope(scope, 'command_duration_seconds', command=name)
+        # Recusas do limite de uso não são erros: já entram em rate_limited_total
+        if error is not None and not isinstance(error, RateLimited):
+            original = getattr(error, 'original', error)
+            metrics.inc('command_errors_total', command=name, error=type(original).__name__)
+
+    async def _on_completion(self, interaction, command):
+        self._finish(interaction, command)
+
+    async def on_error(self, interaction, error):
+        self._finish(interaction, interaction.command, error)
+        # Par do evento app_command_completion, para quem precisa saber que o comando terminou
+        self.client.dispatch('app_command_error', interaction, error)
+        if isinstance(error, app_commands.CheckFailure) and interaction.response.is_done():
+            return # A verificação já respondeu ao usuário (por exemplo, o limite de uso)
+        await super().on_error(interaction, error)
+
+
+class MetricsServer:
+    """Servidor HTTP local que expõe ``GET /metrics`` no formato do Prometheus."""
+
+    def __init__(self, metrics, host='127.0.0.1', port=9108):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._runner = None
+
+    async def start(self):
+        if self._runner is not None:
+            return
+        app = web.Application()
+        app.router.add_get('/metrics', self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        print(f"Métricas disponíveis em http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle(self, request):
+        return web.Response(body=self.metrics.render().encode('utf-8'), headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})
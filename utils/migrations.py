@@ -0,0 +1,239 @@
+from datetime import datetime
+from sqlalchemy import (
+    Column, DateTime, Float, ForeignKey, Integer, MetaData, String, Table, Text,
+    column, extract, func, insert, literal, select, table, text, union_all,
+)
+
+# Cada migração é (versão, descrição, função que recebe uma Connection).
+# As versões aplicadas ficam registradas na tabela 'schema_version'; uma
+# migração nunca deve ser editada depois de publicada, apenas acrescentada.
+# A versão 0 cria as tabelas originais (antes vindas do create_all) e não faz
+# nada em bancos que já as têm.
+
+
+def _initial_schema(conn):
+    # Tabelas originais do bot, como eram criadas pelo create_all antes das migrações
+    metadata = MetaData()
+    Table(
+        'users', metadata,
+        Column('id', Integer, primary_key=True),
+        Column('discord_id', String, unique=True, nullable=False),
+    )
+    Table(
+        'transactions', metadata,
+        Column('id', Integer, primary_key=True),
+        Column('user_id', Integer, ForeignKey('users.id'), nullable=False),
+        Column('type', String, nullable=False),
+        Column('value', Float, nullable=False),
+        Column('category', String),
+        Column('source', String),
+        Column('description', Text),
+        Column('date', DateTime),
+    )
+    Table(
+        'categories', metadata,
+        Column('id', Integer, primary_key=True),
+        Column('user_id', Integer, ForeignKey('users.id'), nullable=False),
+        Column('name', String, nullable=False),
+    )
+    Table(
+        'goals', metadata,
+        Column('id', Integer, primary_key=True),
+        Column('user_id', Integer, ForeignKey('users.id'), nullable=False),
+        Column('name', String, nullable=False),
+        Column('target_value', Float, nullable=False),
+        Column('current_value', Float),
+        Column('due_date', DateTime),
+        Column('completed', Integer),
+    )
+    metadata.create_all(conn, checkfirst=True)
+
+
+def _transaction_indexes(conn):
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_transactions_user_date ON transactions (user_id, date)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_transactions_user_type_category ON transactions (user_id, type, category)"))
+
+
+def _monthly_rollups(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS monthly_rollups ("
+        "user_id INTEGER NOT NULL REFERENCES users (id), "
+        "year INTEGER NOT NULL, "
+        "month INTEGER NOT NULL, "
+        "type VARCHAR NOT NULL, "
+        "label VARCHAR NOT NULL, "
+        "total FLOAT NOT NULL, "
+        "count INTEGER NOT NULL, "
+        "PRIMARY KEY (user_id, year, month, type, label))"
+    ))
+
+    # Preenche a tabela a partir do histórico existente
+    transactions = table(
+        'transactions', column('user_id'), column('type'), column('value'),
+        column('category'), column('source'), column('date'),
+    )
+    rollups = table(
+        'monthly_rollups', column('user_id'), column('year'), column('month'),
+        column('type'), column('label'), column('total'), column('count'),
+    )
+    parts = []
+    for kind, label_column in (('gasto', transactions.c.category), ('renda', transactions.c.source)):
+        year = extract('year', transactions.c.date)
+        month = extract('month', transactions.c.date)
+        label = func.coalesce(label_column, '')
+        parts.append(
+            select(
+                transactions.c.user_id, year, month, literal(kind), label,
+                func.sum(transactions.c.value), func.count(),
+            ).where(transactions.c.type == kind)
+            .group_by(transactions.c.user_id, year, month, label)
+        )
+    conn.execute(insert(rollups).from_select(
+        ['user_id', 'year', 'month', 'type', 'label', 'total', 'count'], union_all(*parts)
+    ))
+
+
+def _report_jobs(conn):
+    # Definição congelada da tabela, independente do modelo atual em db_manager
+    report_jobs = Table(
+        'report_jobs', MetaData(),
+        Column('id', Integer, primary_key=True),
+        Column('discord_id', String, nullable=False),
+        Column('channel_id', String),
+        Column('kind', String, nullable=False),
+        Column('params', Text, nullable=False),
+        Column('status', String, nullable=False),
+        Column('result', Text),
+        Column('created_at', DateTime),
+        Column('updated_at', DateTime),
+    )
+    report_jobs.create(conn, checkfirst=True)
+
+
+def _unique_category_names(conn):
+    # Remove duplicatas (mantendo a mais antiga) antes de criar o índice único
+    conn.execute(text(
+        "DELETE FROM categories WHERE id NOT IN ("
+        "SELECT MIN(id) FROM categories GROUP BY user_id, name)"
+    ))
+    conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ux_categories_user_name ON categories (user_id, name)"))
+
+
+def _unfinished_report_jobs_index(conn):
+    # Índice parcial: só os poucos pedidos ainda não entregues, lidos a cada início do bot
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_report_jobs_unfinished ON report_jobs (id) "
+        "WHERE status IN ('pending', 'running', 'done')"
+    ))
+
+
+def _report_jobs_worker(conn):
+    # Processo (faixa de shards) que enfileirou o pedido; os pedidos antigos são do processo único
+    conn.execute(text("ALTER TABLE report_jobs ADD COLUMN worker VARCHAR"))
+    conn.execute(text("UPDATE report_jobs SET worker = 'default'"))
+
+
+def _transactions_by_category_index(conn):
+    # Páginas do /ver_transacoes filtradas por categoria, já na ordem de data
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_transactions_user_category_date ON transactions (user_id, category, date)"))
+
+
+def _transactions_fulltext(conn):
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_transactions_description_fts ON transactions "
+            "USING GIN (to_tsvector('simple', coalesce(description, '')))"
+        ))
+        return
+    if not conn.execute(text("SELECT sqlite_compileoption_used('ENABLE_FTS5')")).scalar():
+        return # SQLite sem FTS5: o /buscar fica indisponível
+
+    # Tabela sem conteúdo próprio (as descrições ficam só em transactions). A coluna
+    # user_key ('u<id>') faz o próprio índice separar as transações de cada usuário.
+    conn.execute(text(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5("
+        "user_key, description, content='', tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS transactions_fts_insert AFTER INSERT ON transactions "
+        "WHEN new.description IS NOT NULL BEGIN "
+        "INSERT INTO transactions_fts (rowid, user_key, description) VALUES (new.id, 'u' || new.user_id, new.description); "
+        "END"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS transactions_fts_delete AFTER DELETE ON transactions "
+        "WHEN old.description IS NOT NULL BEGIN "
+        "INSERT INTO transactions_fts (transactions_fts, rowid, user_key, description) "
+        "VALUES ('delete', old.id, 'u' || old.user_id, old.description); "
+        "END"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS transactions_fts_update AFTER UPDATE OF user_id, description ON transactions BEGIN "
+        "INSERT INTO transactions_fts (transactions_fts, rowid, user_key, description) "
+        "SELECT 'delete', old.id, 'u' || old.user_id, old.description WHERE old.description IS NOT NULL; "
+        "INSERT INTO transactions_fts (rowid, user_key, description) "
+        "SELECT new.id, 'u' || new.user_id, new.description WHERE new.description IS NOT NULL; "
+        "END"
+    ))
+    conn.execute(text(
+        "INSERT INTO transactions_fts (rowid, user_key, description) "
+        "SELECT id, 'u' || user_id, description FROM transactions WHERE description IS NOT NULL"
+    ))
+
+
+MIGRATIONS = [
+    (0, "Esquema inicial: users, transactions, categories e goals", _initial_schema),
+    (1, "Índices compostos para consultas de transações por usuário", _transaction_indexes),
+    (2, "Tabela monthly_rollups com totais mensais pré-agregados", _monthly_rollups),
+    (3, "Tabela report_jobs para a fila de relatórios em segundo plano", _report_jobs),
+    (4, "Nome de categoria único por usuário", _unique_category_names),
+    (5, "Índice parcial dos pedidos de relatório não entregues", _unfinished_report_jobs_index),
+    (6, "Coluna worker em report_jobs para bots com vários processos", _report_jobs_worker),
+    (7, "Índice de transações por categoria e data", _transactions_by_category_index),
+    (8, "Índice de busca textual nas descrições das transações", _transactions_fulltext),
+]
+
+
+MIGRATION_LOCK_KEY = 7391 # Chave do advisory lock do PostgreSQL durante as migrações
+
+
+def current_version(conn):
+    """Retorna a maior versão de esquema já aplicada (-1 se nenhuma)."""
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        "version INTEGER PRIMARY KEY, description VARCHAR NOT NULL, applied_at TIMESTAMP NOT NULL)"
+    ))
+    return conn.execute(text("SELECT COALESCE(MAX(version), -1) FROM schema_version")).scalar()
+
+
+def apply_migrations(engine):
+    """Aplica, em ordem e cada uma em sua própria transação, as migrações pendentes."""
+    with engine.connect() as lock_conn:
+        if engine.dialect.name == 'postgresql':
+            # Várias instâncias do bot podem iniciar juntas; só uma migra por vez
+            lock_conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            lock_conn.commit()
+        try:
+            return _apply_pending(engine)
+        finally:
+            if engine.dialect.name == 'postgresql':
+                lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+                lock_conn.commit()
+
+
+def _apply_pending(engine):
+    with engine.begin() as conn:
+        version = current_version(conn)
+
+    applied = []
+    for number, description, migrate in MIGRATIONS:
+        if number <= version:
+            continue
+        with engine.begin() as conn:
+            migrate(conn)
+            conn.execute(
+                text("INSERT INTO schema_version (version, description, applied_at) VALUES (:v, :d, :t)"),
+                {"v": number, "d": description, "t": datetime.now()},
+            )
+        applied.append(number)
+    return applied
@@ -0,0 +1,160 @@
+import io
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import Flowable, Image, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+from xml.sax.saxutils import escape
+
+TABLE_HEADER = ["Data", "Tipo", "Valor", "Categoria/Fonte", "Descrição"]
+COL_WIDTHS = [0.8*inch, 0.8*inch, 1.0*inch, 1.2*inch, 2.7*inch]
+SHORT_DESCRIPTION = 40 # Descrições até este tamanho cabem na coluna sem quebra de linha (e sem o custo de um Paragraph)
+
+TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey), # Cabeçalho cinza
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.HexColor('#F5F5DC'), colors.HexColor('#F8F8F8')]), # Cores alternadas
+    ('GRID', (0, 0), (-1, -1), 1, colors.black), # Bordas da grade
+    ('BOX', (0, 0), (-1, -1), 1, colors.black), # Borda externa
+])
+
+
+class TransactionRowFeeder(Flowable):
+    """Marcador no fim da história do documento que puxa as próximas transações.
+
+    Em vez de montar uma tabela com todas as linhas, o documento pede as linhas
+    aos poucos ao gerador de iter_transactions e as agrupa em tabelas de cerca de
+    uma página (``rows_per_table``), que repetem o cabeçalho ao quebrar de página.
+    Tabelas pequenas também evitam o custo quadrático de dividir uma tabela
+    enorme página a página.
+    """
+
+    def __init__(self, chunks, cell_style, rows_per_table=40):
+        super().__init__()
+        self._chunks = chunks
+        self._cell_style = cell_style
+        self._rows_per_table = rows_per_table
+        self._pending = []
+        self._started = False
+        self.rows = 0
+
+    def wrap(self, availWidth, availHeight):
+        return 0, 0
+
+    def draw(self):
+        pass
+
+    def next_table(self):
+        """Retorna a próxima tabela de transações, ou None quando elas acabaram."""
+        while len(self._pending) < self._rows_per_table:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._pending.extend(chunk)
+
+        if not self._pending:
+            if self._started:
+                return None
+            data = [TABLE_HEADER, ["", "", "Nenhuma transação detalhada neste período.", "", ""]]
+        else:
+            batch = self._pending[:self._rows_per_table]
+            del self._pending[:self._rows_per_table]
+            self.rows += len(batch)
+            data = [TABLE_HEADER] + [self._row(t) for t in batch]
+        self._started = True
+
+        table = Table(data, colWidths=COL_WIDTHS, repeatRows=1)
+        table.setStyle(TABLE_STYLE)
+        return table
+
+    def _row(self, t):
+        type_label = "Gasto" if t.type == 'gasto' else "Renda"
+        category_or_source = (t.category if t.type == 'gasto' else t.source) or "N/A"
+        description = t.description or ""
+        return [
+            t.date.strftime('%d/%m/%Y'),
+            type_label,
+            f"R$ {t.value:,.2f}",
+            category_or_source.capitalize(),
+            description if len(description) <= SHORT_DESCRIPTION else Paragraph(escape(description), self._cell_style),
+        ]
+
+
+class StreamingDocTemplate(SimpleDocTemplate):
+    """SimpleDocTemplate que expande o TransactionRowFeeder sob demanda durante o build."""
+
+    def filterFlowables(self, flowables):
+        feeder = flowables[0]
+        if isinstance(feeder, TransactionRowFeeder):
+            table = feeder.next_table()
+            flowables[0:1] = [table, feeder] if table is not None else [None]
+
+
+def build_report_pdf(db, user_id, title, start_date, end_date, summary, goals_summary, chart_png=None, chunk_size=500):
+    """Gera o relatório financeiro em PDF e retorna um buffer com o arquivo.
+
+    As transações do período são lidas de ``db`` (DBManager síncrono) em blocos de
+    ``chunk_size`` enquanto as páginas são montadas, então a memória usada depende
+    do tamanho da página e não do número de transações. Deve ser chamada fora do
+    event loop (por exemplo com ``asyncio.to_thread``).
+    """
+    styles = getSampleStyleSheet()
+    style_heading1 = styles['h1']
+    style_heading2 = styles['h2']
+    style_body = styles['BodyText']
+    style_item = ParagraphStyle('Item', parent=style_body, leftIndent=0.2 * inch)
+    style_cell = ParagraphStyle('Cell', parent=style_body, fontSize=9, leading=11)
+
+    story = [
+        Paragraph(escape(f"Relatório Financeiro - {title}"), style_heading1),
+        Paragraph("Resumo Financeiro", style_heading2),
+        Paragraph(f"Renda Total: R$ {summary['total_renda']:,.2f}", style_body),
+        Paragraph(f"Gastos Totais: R$ {summary['total_gastos']:,.2f}", style_body),
+        Paragraph(f"Saldo: R$ {summary['saldo']:,.2f}", style_body),
+        Spacer(1, 0.2 * inch),
+        Paragraph("Gastos por Categoria", style_heading2),
+    ]
+
+    gastos_por_categoria = summary['gastos_por_categoria']
+    if gastos_por_categoria:
+        for cat, val in gastos_por_categoria.items():
+            story.append(Paragraph(escape(f"- {cat.capitalize()}: R$ {val:,.2f}"), style_item))
+    else:
+        story.append(Paragraph("Nenhum gasto registrado nesta categoria.", style_body))
+    story.append(Spacer(1, 0.2 * inch))
+
+    # --- Gráfico de pizza ---
+    if chart_png:
+        story.append(Image(io.BytesIO(chart_png), width=300, height=300, kind='proportional'))
+    elif gastos_por_categoria:
+        story.append(Paragraph("Gráfico de gastos indisponível no momento.", style_body))
+    else:
+        story.append(Paragraph("Gráfico de gastos não gerado por falta de dados.", style_body))
+    story.append(Spacer(1, 0.2 * inch))
+
+    # --- Progresso de Metas ---
+    story.append(Paragraph("Progresso de Metas", style_heading2))
+    if goals_summary:
+        for goal_line in goals_summary:
+            story.append(Paragraph(escape(goal_line), style_item))
+    else:
+        story.append(Paragraph("Nenhuma meta registrada.", style_body))
+    story.append(Spacer(1, 0.2 * inch))
+
+    # --- Tabela de Transações Detalhadas, lida em blocos ---
+    story.append(Paragraph("Detalhes das Transações", style_heading2))
+    story.append(TransactionRowFeeder(db.iter_transactions(user_id, start_date, end_date, chunk_size), style_cell))
+
+    buffer = io.BytesIO()
+    doc = StreamingDocTemplate(
+        buffer, pagesize=letter,
+        leftMargin=inch, rightMargin=inch, topMargin=inch, bottomMargin=inch,
+        title=f"Relatório Financeiro - {title}",
+    )
+    doc.build(story)
+    buffer.seek(0)
+    return buffer
@@ -1,27 +1,36 @@
-import matplotlib.pyplot as plt
 import io
+import matplotlib
+matplotlib.use('Agg') # Backend sem interface gráfica, apenas renderização em memória
+import matplotlib.style as mstyle
 import matplotlib.ticker as mtick
+from matplotlib.figure import Figure
 
-class PlotGenerator:
-    def __init__(self):
-        plt.style.use('seaborn-v0_8-darkgrid') # Estilo mais agradável
+STYLE = 'seaborn-v0_8-darkgrid' # Estilo mais agradável
 
-    def generate_pie_chart(self, data: dict, title: str):
-        """
-        Gera um gráfico de pizza a partir de um dicionário de dados.
-        Args:
-            data (dict): Dicionário com {categoria: valor}.
-            title (str): Título do gráfico.
-        Returns:
-            io.BytesIO: Objeto BytesIO contendo a imagem do gráfico.
-        """
-        labels = data.keys()
-        sizes = data.values()
+# As funções abaixo usam a API orientada a objetos (Figure) em vez do pyplot,
+# que mantém estado global. Elas retornam os bytes do PNG para que possam ser
+# executadas nos processos do ChartRenderer.
+
+
+def render_pie_chart(data: dict, title: str, figsize=(8, 8), dpi=150) -> bytes:
+    """
+    Gera um gráfico de pizza a partir de um dicionário de dados.
+    Args:
+        data (dict): Dicionário com {categoria: valor}.
+        title (str): Título do gráfico.
+    Returns:
+        bytes: Imagem PNG do gráfico.
+    """
+    labels = list(data.keys())
+    sizes = list(data.values())
+
+    with mstyle.context(STYLE):
+        fig = Figure(figsize=figsize) # Aumenta o tamanho para melhor visualização
+        ax1 = fig.subplots()
 
         # Cores customizadas (opcional, mas melhora a visual)
-        colors = plt.cm.Paired(range(len(labels)))
+        colors = matplotlib.colormaps['Paired'](range(len(labels)))
 
-        fig1, ax1 = plt.subplots(figsize=(8, 8)) # Aumenta o tamanho para melhor visualização
         wedges, texts, autotexts = ax1.pie(sizes, labels=labels, autopct='%1.1f%%',
                                            startangle=90, colors=colors,
                                            pctdistance=0.85, textprops=dict(color="w"))
@@ -39,25 +48,28 @@ class PlotGenerator:
 
         # Salva o gráfico em um buffer de memória
         buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', bbox_inches='tight', dpi=150) # Aumenta DPI para melhor qualidade
-        plt.close(fig1) # Fecha a figura para liberar memória
-        buffer.seek(0)
-        return buffer
-
-    def generate_bar_chart_comparison(self, data: dict, title: str, ylabel: str):
-        """
-        Gera um gráfico de barras para comparação mensal.
-        Args:
-            data (dict): Dicionário com {mês/ano: valor}.
-            title (str): Título do gráfico.
-            ylabel (str): Rótulo do eixo Y.
-        Returns:
-            io.BytesIO: Objeto BytesIO contendo a imagem do gráfico.
-        """
-        months = list(data.keys())
-        values = list(data.values())
-
-        fig, ax = plt.subplots(figsize=(10, 6))
+        fig.savefig(buffer, format='png', bbox_inches='tight', dpi=dpi) # Aumenta DPI para melhor qualidade
+    return buffer.getvalue()
+
+
+def render_bar_chart_comparison(data: dict, title: str, ylabel: str, figsize=(10, 6), dpi=150, line: dict = None, line_label: str = None) -> bytes:
+    """
+    Gera um gráfico de barras para comparação mensal.
+    Args:
+        data (dict): Dicionário com {mês/ano: valor}.
+        title (str): Título do gráfico.
+        ylabel (str): Rótulo do eixo Y.
+        line (dict): Opcional, série sobreposta como linha (ex: média móvel), com as mesmas chaves de data.
+        line_label (str): Legenda da linha.
+    Returns:
+        bytes: Imagem PNG do gráfico.
+    """
+    months = list(data.keys())
+    values = list(data.values())
+
+    with mstyle.context(STYLE):
+        fig = Figure(figsize=figsize)
+        ax = fig.subplots()
         bars = ax.bar(months, values, color='skyblue')
 
         ax.set_title(title, fontsize=16)
@@ -66,14 +78,31 @@ class PlotGenerator:
         ax.tick_params(axis='x', rotation=45)
         ax.yaxis.set_major_formatter(mtick.FormatStrFormatter('R$%.2f')) # Formato monetário
 
-        # Adicionar valores nas barras
-        for bar in bars:
-            yval = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2, yval + 0.05, f'R${yval:,.2f}', ha='center', va='bottom', fontsize=9)
+        if len(months) <= 12:
+            # Adicionar valores nas barras (com muitos meses os textos se sobrepõem)
+            for bar in bars:
+                yval = bar.get_height()
+                ax.text(bar.get_x() + bar.get_width()/2, yval + 0.05, f'R${yval:,.2f}', ha='center', va='bottom', fontsize=9)
+        else:
+            # Um rótulo a cada N meses no eixo X
+            step = -(-len(months) // 12)
+            ax.set_xticks(range(0, len(months), step), months[::step])
 
-        plt.tight_layout() # Ajusta o layout para evitar sobreposição
+        if line:
+            ax.plot(months, [line[m] for m in months], color='darkorange', marker='o', markersize=3, linewidth=2, label=line_label)
+            ax.legend()
+
+        fig.tight_layout() # Ajusta o layout para evitar sobreposição
         buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', bbox_inches='tight', dpi=150)
-        plt.close(fig)
-        buffer.seek(0)
-        return buffer
\ No newline at end of file
+        fig.savefig(buffer, format='png', bbox_inches='tight', dpi=dpi)
+    return buffer.getvalue()
+
+
+class PlotGenerator:
+    """Interface síncrona, que devolve buffers em memória, para uso fora do bot (scripts, benchmarks)."""
+
+    def generate_pie_chart(self, data: dict, title: str):
+        return io.BytesIO(render_pie_chart(data, title))
+
+    def generate_bar_chart_comparison(self, data: dict, title: str, ylabel: str, line: dict = None, line_label: str = None):
+        return io.BytesIO(render_bar_chart_comparison(data, title, ylabel, line=line, line_label=line_label))
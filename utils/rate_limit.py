@@ -0,0 +1,201 @@
+import asyncio
+import math
+import os
+import time
+
+from discord import app_commands
+
+from utils.cache import LRUCache
+
+
+class RateLimited(app_commands.CheckFailure):
+    """O comando foi recusado pelo RateLimiter; o usuário já recebeu a resposta com o tempo de espera."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Balde de fichas: comporta até ``capacity`` usos seguidos e repõe ``capacity`` a cada ``period`` segundos."""
+
+    def __init__(self, capacity, period):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def retry_after(self, now):
+        """Segundos até haver uma ficha disponível (0 se já houver)."""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class Budget:
+    """Orçamento de um grupo de comandos.
+
+    ``user`` e ``guild`` são (usos, segundos) por usuário e por servidor;
+    ``max_concurrent`` limita as execuções simultâneas no processo; com
+    ``shed_on_lag``, os comandos são recusados enquanto o event loop estiver atrasado.
+    """
+
+    def __init__(self, user, guild=None, max_concurrent=None, shed_on_lag=False):
+        self.user = user
+        self.guild = guild
+        self.max_concurrent = max_concurrent
+        self.shed_on_lag = shed_on_lag
+
+
+# Escritas são baratas; relatórios e importações fazem consultas do mês inteiro, gráficos e PDFs
+DEFAULT_BUDGETS = {
+    'escrita': Budget(user=(20, 60), guild=(200, 60)),
+    'relatorio': Budget(user=(3, 60), guild=(20, 60), shed_on_lag=True),
+    'importacao': Budget(user=(2, 300), guild=(5, 300), max_concurrent=2, shed_on_lag=True),
+}
+
+
+REJECTION_MESSAGES = {
+    'usuario': "Você está usando este comando rápido demais. Tente novamente em {seconds}s. ⏳",
+    'servidor': "Este servidor atingiu o limite de uso deste comando. Tente novamente em {seconds}s. ⏳",
+    'simultaneos': "Há muitos pedidos como este em andamento. Tente novamente em {seconds}s. ⏳",
+    'sobrecarga': "O bot está sobrecarregado no momento. Tente novamente em {seconds}s. ⏳",
+}
+
+
+def _parse_limit(value):
+    uses, seconds = value.split('/')
+    return int(uses), float(seconds)
+
+
+class RateLimiter:
+    """Limites de uso por usuário e por servidor (token bucket), com descarte de carga.
+
+    Aplicado aos comandos com a verificação ``rate_limit(nome_do_orçamento)``.
+    Um monitor mede o atraso do event loop; acima de ``max_loop_lag`` segundos,
+    os orçamentos com ``shed_on_lag`` recusam novos comandos até o atraso cair.
+    As vagas de ``max_concurrent`` são liberadas nos eventos de conclusão ou erro do comando.
+    """
+
+    def __init__(self, bot, budgets=None, max_loop_lag=0.5):
+        self.budgets = dict(DEFAULT_BUDGETS if budgets is None else budgets)
+        self.max_loop_lag = max_loop_lag
+        self.metrics = bot.metrics
+        self.loop_lag = 0.0
+        self._buckets = LRUCache(maxsize=100000) # Baldes ociosos despejados já estariam cheios
+        self._running = {name: 0 for name in self.budgets}
+        self._monitor = None
+        self.metrics.gauge('event_loop_lag_seconds', lambda: self.loop_lag)
+        bot.add_listener(self._on_command_finished, 'on_app_command_completion')
+        bot.add_listener(self._on_command_finished, 'on_app_command_error')
+
+    @classmethod
+    def from_env(cls, bot, environ=None, **kwargs):
+        """Lê RATE_LIMIT_<ORÇAMENTO>[_GUILD] ('usos/segundos'), MAX_CONCURRENT_IMPORTS e LOOP_LAG_SHED_MS."""
+        environ = os.environ if environ is None else environ
+        budgets = {}
+        for name, default in DEFAULT_BUDGETS.items():
+            key = f"RATE_LIMIT_{name.upper()}"
+            budgets[name] = Budget(
+                user=_parse_limit(environ[key]) if environ.get(key) else default.user,
+                guild=_parse_limit(environ[key + '_GUILD']) if environ.get(key + '_GUILD') else default.guild,
+                max_concurrent=default.max_concurrent,
+                shed_on_lag=default.shed_on_lag,
+            )
+        if environ.get('MAX_CONCURRENT_IMPORTS'):
+            budgets['importacao'].max_concurrent = int(environ['MAX_CONCURRENT_IMPORTS'])
+        if environ.get('LOOP_LAG_SHED_MS'):
+            kwargs.setdefault('max_loop_lag', float(environ['LOOP_LAG_SHED_MS']) / 1000)
+        return cls(bot, budgets, **kwargs)
+
+    # --- Atraso do event loop ---
+
+    def start(self, interval=0.25):
+        """Inicia o monitor de atraso do event loop. Idempotente."""
+        if self._monitor is None:
+            self._monitor = asyncio.create_task(self._watch_loop(interval))
+
+    async def _watch_loop(self, interval):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + interval
+            await asyncio.sleep(interval)
+            lag = max(0.0, loop.time() - expected)
+            # Sobe na hora e desce aos poucos, para não alternar a cada medição
+            self.loop_lag = max(lag, self.loop_lag * 0.8)
+
+    def stop(self):
+        if self._monitor is not None:
+            self._monitor.cancel()
+            self._monitor = None
+
+    # --- Verificação ---
+
+    def _bucket(self, budget_name, scope, key, limit):
+        bucket_key = (budget_name, scope, key)
+        bucket = self._buckets.get(bucket_key)
+        if bucket is None:
+            bucket = TokenBucket(*limit)
+            self._buckets.set(bucket_key, bucket)
+        return bucket
+
+    def acquire(self, budget_name, user_id, guild_id=None):
+        """Consome uma ficha do orçamento; retorna None se permitido, ou (motivo, segundos de espera)."""
+        budget = self.budgets[budget_name]
+        if budget.shed_on_lag and self.loop_lag > self.max_loop_lag:
+            return 'sobrecarga', max(5.0, self.loop_lag * 10)
+        if budget.max_concurrent is not None and self._running[budget_name] >= budget.max_concurrent:
+            return 'simultaneos', 10.0
+
+        now = time.monotonic()
+        buckets = [('usuario', self._bucket(budget_name, 'usuario', user_id, budget.user))]
+        if guild_id is not None and budget.guild is not None:
+            buckets.append(('servidor', self._bucket(budget_name, 'servidor', guild_id, budget.guild)))
+        # Só consome as fichas se todos os baldes permitirem
+        for scope, bucket in buckets:
+            wait = bucket.retry_after(now)
+            if wait:
+                return scope, wait
+        for _, bucket in buckets:
+            bucket.take()
+        self._running[budget_name] += 1
+        return None
+
+    def release(self, budget_name):
+        self._running[budget_name] -= 1
+
+    async def check(self, interaction, budget_name):
+        rejection = self.acquire(budget_name, interaction.user.id, interaction.guild_id)
+        if rejection is None:
+            interaction.extras['rate_limit_budget'] = budget_name
+            return True
+
+        reason, retry_after = rejection
+        self.metrics.inc('rate_limited_total', budget=budget_name, reason=reason)
+        message = REJECTION_MESSAGES[reason].format(seconds=math.ceil(retry_after))
+        if not interaction.response.is_done():
+            await interaction.response.send_message(message, ephemeral=True)
+        raise RateLimited(message, retry_after)
+
+    async def _on_command_finished(self, interaction, *args):
+        budget_name = interaction.extras.pop('rate_limit_budget', None)
+        if budget_name is not None:
+            self.release(budget_name)
+
+
+def rate_limit(budget_name):
+    """Verificação de comando de barra que aplica o orçamento ``budget_name`` do RateLimiter do bot."""
+
+    async def predicate(interaction):
+        limiter = getattr(interaction.client, 'rate_limiter', None)
+        if limiter is None:
+            return True
+        return await limiter.check(interaction, budget_name)
+
+    return app_commands.check(predicate)
@@ -0,0 +1,270 @@
+import asyncio
+import io
+import json
+import os
+import time
+import traceback
+import discord
+
+
+class ReportQueueFull(Exception):
+    """O usuário já tem o número máximo de relatórios na fila."""
+
+
+class ReportResult:
+    """Resultado de um relatório: texto, embed opcional e arquivos [(nome, bytes)]."""
+
+    def __init__(self, content=None, embed=None, files=None):
+        self.content = content
+        self.embed = embed
+        self.files = files or []
+
+
+class _Job:
+    def __init__(self, id, discord_id, channel_id, kind, params, key):
+        self.id = id
+        self.discord_id = discord_id
+        self.channel_id = channel_id
+        self.kind = kind
+        self.params = params
+        self.key = key
+        self.watchers = [] # Interações (já adiadas) que aguardam este resultado
+
+
+class ReportJobQueue:
+    """Fila de relatórios em segundo plano, com limites globais e por usuário.
+
+    Os pedidos ficam registrados na tabela 'report_jobs'. Pedidos idênticos ainda
+    pendentes são agrupados num único job, o progresso é mostrado editando a
+    resposta adiada de cada interação e, se a interação já tiver expirado (ou o
+    bot tiver reiniciado), o resultado é enviado no canal original ou por DM.
+
+    ``worker_id`` identifica o processo quando vários processos do bot dividem o
+    mesmo banco: cada um retoma, ao iniciar, apenas os pedidos que enfileirou.
+    ``max_pending`` limita os jobs na fila ou em execução no processo inteiro.
+    """
+
+    def __init__(self, bot, workers=2, max_per_user=2, results_dir='database/reports', worker_id='default', max_pending=20):
+        self.bot = bot
+        self.db = bot.db
+        self.metrics = bot.metrics
+        self.worker_id = worker_id
+        self.workers = workers
+        self.max_per_user = max_per_user
+        self.max_pending = max_pending
+        self.results_dir = results_dir
+        self._handlers = {}
+        self._queue = None # Criada em start(), já dentro do event loop do bot
+        self._active = {} # chave de deduplicação -> _Job
+        self._per_user = {} # discord_id -> jobs ativos
+        self._user_locks = {} # discord_id -> Lock; os jobs de um usuário rodam um de cada vez (só enquanto ele tem jobs)
+        self._tasks = []
+        os.makedirs(results_dir, exist_ok=True)
+        self.metrics.gauge('report_queue_depth', lambda: self.depth)
+
+    @property
+    def depth(self):
+        """Quantidade de jobs aguardando um worker."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def register(self, kind, handler):
+        """Registra ``async handler(discord_id, params, progress) -> ReportResult`` para um tipo de relatório."""
+        self._handlers[kind] = handler
+
+    async def start(self):
+        """Inicia os workers e retoma os jobs não entregues antes do último reinício. Idempotente."""
+        if self._tasks:
+            return
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        await self._resume()
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, interaction, kind, params):
+        """Enfileira um relatório para a interação (já adiada), ou a associa a um job idêntico pendente."""
+        discord_id = str(interaction.user.id)
+        key = f"{discord_id}:{kind}:{json.dumps(params, sort_keys=True)}"
+
+        job = self._active.get(key)
+        if job is not None:
+            job.watchers.append(interaction)
+            await self._edit(interaction, "Um relatório idêntico já está sendo gerado; você receberá o mesmo resultado.")
+            return job
+
+        if self._per_user.get(discord_id, 0) >= self.max_per_user:
+            raise ReportQueueFull(f"Você já tem {self.max_per_user} relatórios na fila. Aguarde a conclusão deles.")
+        if len(self._active) >= self.max_pending:
+            raise ReportQueueFull("A fila de relatórios está cheia no momento. Tente novamente em alguns instantes. ⏳")
+
+        # Reserva o job antes de qualquer await, para que pedidos simultâneos o encontrem
+        channel_id = str(interaction.channel_id) if interaction.channel_id else None
+        job = _Job(None, discord_id, channel_id, kind, params, key)
+        job.watchers.append(interaction)
+        self._reserve(job)
+        try:
+            job.id = await self.db.create_report_job(discord_id, channel_id, kind, json.dumps(params), self.worker_id)
+        except Exception:
+            self._release(job)
+            raise
+        self._queue.put_nowait(job)
+        await self._edit(interaction, f"Relatório na fila (posição {self.depth}). ⏳")
+        return job
+
+    def _reserve(self, job):
+        self._active[job.key] = job
+        self._per_user[job.discord_id] = self._per_user.get(job.discord_id, 0) + 1
+
+    def _release(self, job):
+        self._active.pop(job.key, None)
+        self._per_user[job.discord_id] -= 1
+        if not self._per_user[job.discord_id]:
+            del self._per_user[job.discord_id]
+            self._user_locks.pop(job.discord_id, None) # Nenhum outro job do usuário espera por ele
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            except Exception:
+                traceback.print_exc()
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job):
+        lock = self._user_locks.setdefault(job.discord_id, asyncio.Lock())
+        try:
+            async with lock:
+                await self.db.update_report_job(job.id, status='running')
+
+                async def progress(text):
+                    for interaction in list(job.watchers):
+                        await self._edit(interaction, text)
+
+                # O job roda fora da tarefa da interação, então tem o seu próprio escopo de métricas
+                try:
+                    with self.metrics.scope(f"relatorio:{job.kind}"), self.metrics.time('report_build_seconds', kind=job.kind):
+                        result = await self._handlers[job.kind](job.discord_id, job.params, progress)
+                except Exception:
+                    traceback.print_exc()
+                    self.metrics.inc('report_failures_total', kind=job.kind)
+                    await self.db.update_report_job(job.id, status='failed')
+                    await progress("Ocorreu um erro ao gerar o relatório. Tente novamente mais tarde.")
+                    return
+
+                # Salva o resultado antes de entregar, para poder reenviá-lo após um reinício
+                paths = await asyncio.to_thread(self._save_files, job.id, result.files) # PDFs de vários MB, fora do event loop
+                await self.db.update_report_job(job.id, status='done', result=json.dumps({
+                    'content': result.content,
+                    'embed': result.embed.to_dict() if result.embed else None,
+                    'files': paths,
+                }))
+        finally:
+            self._release(job)
+
+        await self._deliver(job, result)
+
+    def _save_files(self, job_id, files):
+        paths = []
+        for filename, data in files:
+            path = os.path.join(self.results_dir, f"{job_id}_{filename}")
+            with open(path, 'wb') as f:
+                f.write(data)
+            paths.append(path)
+        return paths
+
+    async def _deliver(self, job, result):
+        started = time.perf_counter()
+        delivered = False
+        for interaction in job.watchers:
+            try:
+                await interaction.followup.send(**self._message_kwargs(result))
+                await self._edit(interaction, "Relatório concluído. ✅")
+                delivered = True
+            except discord.HTTPException:
+                pass # Token da interação expirado (mais de 15 minutos); tenta o canal abaixo
+
+        if not delivered:
+            delivered = await self._deliver_to_channel(job, result)
+        self.metrics.observe('report_upload_seconds', time.perf_counter() - started, kind=job.kind)
+
+        if delivered:
+            await self.db.update_report_job(job.id, status='delivered')
+            await asyncio.to_thread(self._remove_files, job.id, result.files)
+
+    async def _deliver_to_channel(self, job, result):
+        kwargs = self._message_kwargs(result)
+        kwargs['content'] = f"<@{job.discord_id}> {kwargs.get('content') or 'Seu relatório ficou pronto.'}"
+        try:
+            channel = None
+            if job.channel_id:
+                channel = self.bot.get_channel(int(job.channel_id))
+                if channel is None:
+                    channel = await self.bot.fetch_channel(int(job.channel_id))
+            if channel is None:
+                channel = await self.bot.fetch_user(int(job.discord_id))
+            await channel.send(**kwargs)
+            return True
+        except discord.HTTPException:
+            traceback.print_exc()
+            return False
+
+    @staticmethod
+    def _message_kwargs(result):
+        # discord.File não pode ser reaproveitado entre envios, então é recriado a cada mensagem
+        kwargs = {'content': result.content}
+        if result.embed:
+            kwargs['embed'] = result.embed
+        if result.files:
+            kwargs['files'] = [discord.File(io.BytesIO(data), filename=name) for name, data in result.files]
+        return kwargs
+
+    @staticmethod
+    def _load_files(paths):
+        files = []
+        for path in paths:
+            try:
+                with open(path, 'rb') as f:
+                    files.append((os.path.basename(path).split('_', 1)[1], f.read()))
+            except OSError:
+                pass
+        return files
+
+    def _remove_files(self, job_id, files):
+        for filename, _ in files:
+            try:
+                os.remove(os.path.join(self.results_dir, f"{job_id}_{filename}"))
+            except OSError:
+                pass
+
+    async def _resume(self):
+        for row in await self.db.get_unfinished_report_jobs(self.worker_id):
+            params = json.loads(row.params)
+            key = f"{row.discord_id}:{row.kind}:{json.dumps(params, sort_keys=True)}"
+            job = _Job(row.id, row.discord_id, row.channel_id, row.kind, params, key)
+            if row.status != 'done':
+                if row.kind in self._handlers and key not in self._active:
+                    self._reserve(job)
+                    self._queue.put_nowait(job)
+                else:
+                    # Tipo não registrado neste processo ou pedido repetido: não ficaria pendente para sempre
+                    await self.db.update_report_job(row.id, status='failed')
+                continue
+
+            stored = json.loads(row.result)
+            files = await asyncio.to_thread(self._load_files, stored['files'])
+            embed = discord.Embed.from_dict(stored['embed']) if stored['embed'] else None
+            await self._deliver(job, ReportResult(stored['content'], embed, files))
+
+    @staticmethod
+    async def _edit(interaction, text):
+        try:
+            await interaction.edit_original_response(content=text)
+        except discord.HTTPException:
+            pass
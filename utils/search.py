@@ -0,0 +1,58 @@
+import re
+
+# Na busca, "frase entre aspas" procura as palavras em sequência e palavra* procura pelo prefixo;
+# as demais palavras precisam aparecer todas, em qualquer ordem.
+_TOKEN = re.compile(r'"([^"]*)"|(\S+)')
+_WORD = re.compile(r'\w+')
+
+MAX_TERMS = 16
+
+
+def parse_search_query(text):
+    """Converte o texto digitado em termos [(tipo, palavras)], com tipo 'palavra', 'prefixo' ou 'frase'.
+
+    Só letras e números são mantidos, então a sintaxe própria do FTS5 ou do
+    tsquery nunca chega ao banco. Levanta ValueError se não sobrar nenhum termo.
+    """
+    terms = []
+    for phrase, token in _TOKEN.findall(text or ""):
+        if phrase:
+            words = _WORD.findall(phrase.lower())
+            if len(words) > 1:
+                terms.append(('frase', words))
+            elif words:
+                terms.append(('palavra', words))
+            continue
+        words = _WORD.findall(token.lower())
+        if not words:
+            continue
+        # 'super*' é um prefixo; 'pão-de-queijo' vira as palavras em sequência, como o tokenizador as indexa
+        if len(words) > 1:
+            terms.append(('frase', words))
+        else:
+            terms.append(('prefixo' if token.endswith('*') else 'palavra', words))
+    if not terms:
+        raise ValueError("Digite ao menos uma palavra para buscar.")
+    return terms[:MAX_TERMS]
+
+
+def to_fts5(terms):
+    """Expressão MATCH do FTS5 (termos ligados por AND)."""
+    parts = []
+    for kind, words in terms:
+        quoted = '"' + " ".join(words) + '"'
+        parts.append(quoted + '*' if kind == 'prefixo' else quoted)
+    return " AND ".join(parts)
+
+
+def to_tsquery(terms):
+    """Expressão para to_tsquery do PostgreSQL, equivalente à do FTS5."""
+    parts = []
+    for kind, words in terms:
+        if kind == 'frase':
+            parts.append("(" + " <-> ".join(f"'{w}'" for w in words) + ")")
+        elif kind == 'prefixo':
+            parts.append(f"'{words[0]}':*")
+        else:
+            parts.append(f"'{words[0]}'")
+    return " & ".join(parts)
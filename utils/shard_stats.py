@@ -0,0 +1,107 @@
+import time
+from collections import Counter, deque
+
+
+class RateCounter:
+    """Conta eventos em janelas de um segundo para calcular a taxa recente (eventos/s)."""
+
+    def __init__(self, window=60):
+        self.window = window
+        self.total = 0
+        self._buckets = deque() # [segundo, contagem]
+
+    def add(self, count=1):
+        now = int(time.monotonic())
+        if self._buckets and self._buckets[-1][0] == now:
+            self._buckets[-1][1] += count
+        else:
+            self._buckets.append([now, count])
+        self.total += count
+        self._trim(now)
+
+    def _trim(self, now):
+        while self._buckets and self._buckets[0][0] <= now - self.window:
+            self._buckets.popleft()
+
+    def rate(self):
+        self._trim(int(time.monotonic()))
+        return sum(count for _, count in self._buckets) / self.window
+
+
+class _ShardCounters:
+    def __init__(self):
+        self.interactions = RateCounter()
+        self.connects = 0
+        self.disconnects = 0
+        self.resumes = 0
+        self.last_connect = None
+
+
+class ShardStats:
+    """Estatísticas por shard: latência, guilds, reconexões e taxa de interações.
+
+    O discord.py não informa o shard de cada evento do gateway, então a taxa
+    total de eventos é medida pelo processo e a taxa por shard considera as
+    interações (o que de fato gera trabalho para o bot).
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.started = time.monotonic()
+        self.events = RateCounter()
+        self.event_types = Counter()
+        self._shards = {}
+        bot.add_listener(self.on_socket_event_type)
+        bot.add_listener(self.on_interaction)
+        bot.add_listener(self.on_shard_connect)
+        bot.add_listener(self.on_shard_disconnect)
+        bot.add_listener(self.on_shard_resumed)
+
+    def _shard(self, shard_id):
+        counters = self._shards.get(shard_id)
+        if counters is None:
+            counters = self._shards[shard_id] = _ShardCounters()
+        return counters
+
+    async def on_socket_event_type(self, event_type):
+        self.events.add()
+        self.event_types[event_type] += 1
+
+    async def on_interaction(self, interaction):
+        if interaction.guild_id is not None:
+            shard_id = (interaction.guild_id >> 22) % (self.bot.shard_count or 1)
+        else:
+            shard_id = 0 # DMs chegam sempre pelo shard 0
+        self._shard(shard_id).interactions.add()
+
+    async def on_shard_connect(self, shard_id):
+        counters = self._shard(shard_id)
+        counters.connects += 1
+        counters.last_connect = time.time()
+
+    async def on_shard_disconnect(self, shard_id):
+        self._shard(shard_id).disconnects += 1
+
+    async def on_shard_resumed(self, shard_id):
+        self._shard(shard_id).resumes += 1
+
+    def snapshot(self):
+        """Retorna uma lista com as estatísticas de cada shard deste processo."""
+        guilds = Counter(guild.shard_id for guild in self.bot.guilds)
+        latencies = dict(self.bot.latencies)
+        shard_ids = latencies.keys() | self._shards.keys() | set(self.bot.shard_ids or [])
+        shards = []
+        for shard_id in sorted(shard_ids):
+            counters = self._shard(shard_id)
+            latency = latencies.get(shard_id)
+            shards.append({
+                'id': shard_id,
+                'latency_ms': latency * 1000 if latency is not None and latency == latency else None, # NaN antes do 1º heartbeat
+                'guilds': guilds.get(shard_id, 0),
+                'interactions': counters.interactions.total,
+                'interactions_per_minute': counters.interactions.rate() * 60,
+                'connects': counters.connects,
+                'disconnects': counters.disconnects,
+                'resumes': counters.resumes,
+            })
+        return shards
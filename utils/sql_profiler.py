@@ -0,0 +1,100 @@
+import os
+import time
+from collections import Counter
+
+from sqlalchemy import event
+
+from utils.metrics import current_scope
+
+MAX_PARAMS_CHARS = 500
+
+
+def _short(text, limit):
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+class SQLProfiler:
+    """Profiler de SQL opcional, ligado aos eventos do engine.
+
+    Registra no log as consultas mais lentas que ``slow_query_ms``, com os
+    parâmetros, e, ao fim de cada comando ou relatório (os escopos do
+    ``Metrics``), aponta consultas repetidas ``repeat_threshold`` vezes ou mais,
+    o sinal típico de N+1. Os totais ficam em ``stats()`` e nos contadores do
+    ``Metrics``.
+    """
+
+    def __init__(self, metrics, slow_query_ms=200, repeat_threshold=10, log=print):
+        self.metrics = metrics
+        self.slow_query_ms = slow_query_ms
+        self.repeat_threshold = repeat_threshold
+        self.log = log
+        self.slow_queries = 0
+        self.repeated = Counter() # escopo -> vezes em que houve repetição
+        self._commands = {} # escopo -> [execuções, consultas, máximo de consultas]
+        metrics.add_scope_listener(self._on_scope_closed)
+
+    @classmethod
+    def from_env(cls, metrics, environ=None, **kwargs):
+        """Cria o profiler se SQL_PROFILE estiver ligado (SQL_SLOW_MS, SQL_REPEAT_THRESHOLD); senão retorna None."""
+        environ = os.environ if environ is None else environ
+        if environ.get('SQL_PROFILE', '').lower() not in ('1', 'true', 'yes', 'sim'):
+            return None
+        if environ.get('SQL_SLOW_MS'):
+            kwargs.setdefault('slow_query_ms', float(environ['SQL_SLOW_MS']))
+        if environ.get('SQL_REPEAT_THRESHOLD'):
+            kwargs.setdefault('repeat_threshold', int(environ['SQL_REPEAT_THRESHOLD']))
+        return cls(metrics, **kwargs)
+
+    def instrument(self, engine):
+        event.listen(engine, 'before_cursor_execute', self._before_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_execute)
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('profiler_started', []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info['profiler_started'].pop()) * 1000
+        scope = current_scope()
+        params = f"{len(parameters)} linhas" if executemany else repr(parameters)
+        if scope is not None:
+            scope.statements[(statement, params)] += 1
+
+        if elapsed_ms >= self.slow_query_ms:
+            self.slow_queries += 1
+            command = scope.name if scope is not None else '-'
+            self.metrics.inc('db_slow_queries_total', command=command)
+            self.log(f"[SQL lenta] {elapsed_ms:.0f} ms em {command}: {_short(statement, 2000)} | parâmetros: {_short(params, MAX_PARAMS_CHARS)}")
+
+    def _on_scope_closed(self, scope):
+        counters = self._commands.setdefault(scope.name, [0, 0, 0])
+        counters[0] += 1
+        counters[1] += scope.queries
+        counters[2] = max(counters[2], scope.queries)
+
+        by_statement = Counter()
+        identical = Counter()
+        for (statement, _), count in scope.statements.items():
+            by_statement[statement] += count
+            identical[statement] = max(identical[statement], count)
+        for statement, count in by_statement.items():
+            if count < self.repeat_threshold:
+                continue
+            self.repeated[scope.name] += 1
+            self.metrics.inc('db_repeated_statements_total', command=scope.name)
+            self.log(
+                f"[SQL repetida] {scope.name} executou {count}x a mesma consulta "
+                f"(até {identical[statement]}x com parâmetros idênticos): {_short(statement, 300)}"
+            )
+
+    def stats(self):
+        """Retorna, por comando, execuções, média e máximo de consultas e quantas vezes houve repetição."""
+        return {
+            name: {
+                'runs': runs,
+                'avg_queries': queries / runs,
+                'max_queries': max_queries,
+                'repeated': self.repeated.get(name, 0),
+            }
+            for name, (runs, queries, max_queries) in self._commands.items()
+        }
@@ -0,0 +1,180 @@
+import codecs
+import csv
+import io
+import re
+import unicodedata
+from datetime import datetime
+
+# Nomes de coluna aceitos no cabeçalho do CSV (sem acentos, em minúsculas)
+CSV_COLUMNS = {
+    'date': {'data', 'date', 'dt', 'data lancamento', 'data do lancamento', 'data da transacao'},
+    'value': {'valor', 'value', 'amount', 'quantia', 'montante', 'valor (r$)'},
+    'description': {'descricao', 'description', 'historico', 'memo', 'lancamento', 'detalhes'},
+    'category': {'categoria', 'category'},
+    'source': {'fonte', 'source', 'origem'},
+    'type': {'tipo', 'type'},
+}
+EXPENSE_TYPES = {'gasto', 'despesa', 'debito', 'debit', 'saida', 'd'}
+INCOME_TYPES = {'renda', 'receita', 'credito', 'credit', 'entrada', 'c'}
+DATE_FORMATS = ('%d/%m/%Y', '%Y-%m-%d', '%d/%m/%y', '%d-%m-%Y', '%Y/%m/%d', '%Y-%m-%d %H:%M:%S')
+
+OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<\r\n]*)')
+
+
+def _normalize(text):
+    text = unicodedata.normalize('NFKD', text.strip().lower())
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+
+def parse_value(text):
+    """Converte '1.234,56', '-12,50', 'R$ 10' ou '10.5' em float."""
+    text = text.replace('R$', '').replace(' ', '').strip()
+    if ',' in text and '.' in text:
+        if text.rindex(',') > text.rindex('.'):
+            text = text.replace('.', '').replace(',', '.')
+        else:
+            text = text.replace(',', '')
+    elif ',' in text:
+        text = text.replace(',', '.')
+    return float(text)
+
+
+class StatementReader:
+    """Lê um extrato CSV ou OFX linha a linha e produz as transações como dicionários.
+
+    Cada item tem ``type``, ``value`` (positivo), ``date``, ``category``,
+    ``source`` e ``description``, prontos para ``DBManager.import_transactions``.
+    Linhas que não puderem ser interpretadas são contadas em ``invalid``.
+    """
+
+    def __init__(self, data, filename='', default_category='importado', default_source='importado'):
+        self.data = data
+        self.filename = filename.lower()
+        self.default_category = default_category.lower()
+        self.default_source = default_source
+        self.invalid = 0
+        self._date_format = DATE_FORMATS[0]
+
+    def _encoding(self):
+        # Extratos de bancos brasileiros costumam vir em Latin-1 quando não estão em UTF-8
+        try:
+            codecs.getincrementaldecoder('utf-8')().decode(self.data[:65536])
+            return 'utf-8-sig'
+        except UnicodeDecodeError:
+            return 'latin-1'
+
+    def _lines(self):
+        return io.TextIOWrapper(io.BytesIO(self.data), encoding=self._encoding(), errors='replace', newline='')
+
+    def is_ofx(self):
+        head = self.data[:1024].lstrip().upper()
+        return self.filename.endswith(('.ofx', '.qfx')) or head.startswith(b'OFXHEADER') or b'<OFX>' in head
+
+    def __iter__(self):
+        return self._read_ofx() if self.is_ofx() else self._read_csv()
+
+    def _parse_date(self, text):
+        text = text.strip()
+        # Atalhos para os formatos mais comuns, já que strptime domina o tempo de leitura
+        if len(text) == 10 and text[2] == text[5] == '/':
+            return datetime(int(text[6:]), int(text[3:5]), int(text[:2]))
+        if len(text) == 10 and text[4] == text[7] == '-':
+            return datetime.fromisoformat(text)
+        try:
+            return datetime.strptime(text, self._date_format)
+        except ValueError:
+            pass
+        for fmt in DATE_FORMATS:
+            try:
+                date = datetime.strptime(text, fmt)
+            except ValueError:
+                continue
+            self._date_format = fmt # O formato costuma se repetir em todo o arquivo
+            return date
+        raise ValueError(f"Data inválida: {text}")
+
+    def _row(self, date, value, kind=None, category=None, source=None, description=None):
+        if kind is None:
+            kind = 'gasto' if value < 0 else 'renda'
+        value = abs(value)
+        if not value:
+            raise ValueError("Valor zerado")
+        description = (description or '').strip() or None
+        return {
+            'type': kind,
+            'value': value,
+            'date': date,
+            'category': ((category or '').strip().lower() or self.default_category) if kind == 'gasto' else None,
+            'source': ((source or '').strip() or self.default_source) if kind == 'renda' else None,
+            'description': description,
+        }
+
+    def _read_csv(self):
+        lines = self._lines()
+        sample = lines.readline()
+        if not sample.strip():
+            raise ValueError("O arquivo CSV está vazio.")
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t|')
+        except csv.Error:
+            dialect = csv.excel
+
+        header = next(csv.reader([sample], dialect))
+        columns = {}
+        for index, name in enumerate(header):
+            name = _normalize(name)
+            for field, aliases in CSV_COLUMNS.items():
+                if name in aliases and field not in columns:
+                    columns[field] = index
+        if 'date' not in columns or 'value' not in columns:
+            raise ValueError("O CSV precisa de um cabeçalho com as colunas 'data' e 'valor'.")
+
+        def cell(record, field):
+            index = columns.get(field)
+            return record[index] if index is not None and index < len(record) else None
+
+        for record in csv.reader(lines, dialect):
+            if not any(record):
+                continue
+            try:
+                kind = cell(record, 'type')
+                if kind is not None:
+                    kind = _normalize(kind)
+                    kind = 'gasto' if kind in EXPENSE_TYPES else 'renda' if kind in INCOME_TYPES else None
+                yield self._row(
+                    self._parse_date(cell(record, 'date')),
+                    parse_value(cell(record, 'value')),
+                    kind,
+                    cell(record, 'category'),
+                    cell(record, 'source'),
+                    cell(record, 'description'),
+                )
+            except (AttributeError, ValueError):
+                self.invalid += 1
+
+    def _read_ofx(self):
+        current = None
+        for line in self._lines():
+            for closing, tag, value in OFX_TAG.findall(line):
+                tag = tag.upper()
+                if tag == 'STMTTRN':
+                    if not closing:
+                        current = {}
+                        continue
+                    row = self._ofx_transaction(current) if current is not None else None
+                    if row is not None:
+                        yield row
+                    current = None
+                elif current is not None and not closing:
+                    current[tag] = value.strip()
+
+    def _ofx_transaction(self, fields):
+        try:
+            date = datetime.strptime(fields['DTPOSTED'][:8], '%Y%m%d')
+            value = parse_value(fields['TRNAMT'])
+            name = fields.get('NAME')
+            description = fields.get('MEMO') or name
+            return self._row(date, value, source=name, description=description)
+        except (KeyError, ValueError):
+            self.invalid += 1
+            return None
@@ -0,0 +1,111 @@
+import asyncio
+
+import discord
+
+PAGE_SIZE = 10 # Transações por página do /ver_transacoes
+
+
+def format_transaction(row):
+    """Uma linha de lista para a transação (id, data, valor, categoria ou fonte e descrição)."""
+    date_str = row.date.strftime('%d/%m/%Y') if row.date else "--/--/----"
+    if row.type == 'gasto':
+        label = f"🔴 R$ {row.value:,.2f} em {(row.category or 'sem categoria').capitalize()}"
+    else:
+        label = f"🟢 R$ {row.value:,.2f} de {row.source or 'fonte não informada'}"
+    line = f"`#{row.id}` {date_str} {label}"
+    if row.description:
+        line += f" — {row.description[:60]}"
+    return line
+
+
+class TransactionBrowser(discord.ui.View):
+    """Navegação página a página pelas transações de um usuário, com botões de anterior/próxima.
+
+    As páginas vêm de ``get_transactions_page`` (paginação por chave): cada página
+    guarda o cursor com que foi lida, para voltar sem OFFSET, e a página seguinte
+    é buscada em segundo plano enquanto o usuário lê a atual.
+    """
+
+    def __init__(self, db, user_id, owner_id, filters=None, description=None, page_size=PAGE_SIZE, timeout=300):
+        super().__init__(timeout=timeout)
+        self.db = db
+        self.user_id = user_id
+        self.owner_id = owner_id
+        self.filters = filters or {}
+        self.description = description
+        self.page_size = page_size
+        self.message = None # Definida por quem envia a view, para desativar os botões no timeout
+        self.cursors = [None] # Cursor de cada página visitada; a última é a página atual
+        self.rows = []
+        self.has_next = False
+        self._prefetch = None # (cursor, task) da próxima página
+
+    async def _fetch(self, before):
+        # Uma linha a mais diz se existe página seguinte
+        rows = await self.db.get_transactions_page(self.user_id, before=before, limit=self.page_size + 1, **self.filters)
+        return rows[:self.page_size], len(rows) > self.page_size
+
+    async def _load(self, before):
+        """Lê a página que começa depois de ``before``, usando a pré-busca se ela for dessa página."""
+        prefetched, self._prefetch = self._prefetch, None
+        if prefetched is not None:
+            cursor, task = prefetched
+            if cursor == before:
+                self.rows, self.has_next = await task
+            else:
+                task.cancel()
+                self.rows, self.has_next = await self._fetch(before)
+        else:
+            self.rows, self.has_next = await self._fetch(before)
+
+        if self.has_next:
+            cursor = (self.rows[-1].date, self.rows[-1].id)
+            self._prefetch = (cursor, asyncio.create_task(self._fetch(cursor)))
+        self.previous_page.disabled = len(self.cursors) == 1
+        self.next_page.disabled = not self.has_next
+
+    async def start(self):
+        """Carrega a primeira página e retorna o embed dela."""
+        await self._load(None)
+        return self.build_embed()
+
+    def build_embed(self):
+        embed = discord.Embed(title="Suas Transações", description=self.description, color=discord.Color.dark_teal())
+        if not self.rows:
+            embed.add_field(name="Nenhuma transação encontrada", value="Tente outros filtros.", inline=False)
+            return embed
+
+        lines = "\n".join(format_transaction(row) for row in self.rows)
+        embed.add_field(name=f"Página {len(self.cursors)}", value=lines[:1024], inline=False)
+        embed.set_footer(text="Da mais recente para a mais antiga.")
+        return embed
+
+    async def interaction_check(self, interaction):
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message("Só quem usou o comando pode navegar por estas transações.", ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(label="Anterior", emoji="⬅️", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction, button):
+        self.cursors.pop()
+        await self._load(self.cursors[-1])
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+    @discord.ui.button(label="Próxima", emoji="➡️", style=discord.ButtonStyle.primary)
+    async def next_page(self, interaction, button):
+        self.cursors.append((self.rows[-1].date, self.rows[-1].id))
+        await self._load(self.cursors[-1])
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+    async def on_timeout(self):
+        if self._prefetch is not None:
+            self._prefetch[1].cancel()
+            self._prefetch = None
+        for item in self.children:
+            item.disabled = True
+        if self.message is not None:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass # Mensagem apagada ou token da interação expirado
@@ -0,0 +1,81 @@
+import numpy as np
+
+from utils.db_manager import add_months
+
+
+def month_labels(start_year, start_month, months):
+    """Rótulos 'MM/AAAA' dos ``months`` meses a partir de start."""
+    return [f"{m:02d}/{y}" for y, m in (add_months(start_year, start_month, i) for i in range(months))]
+
+
+def moving_average(values, window):
+    """Média móvel de ``window`` meses; os primeiros meses usam a média dos que já existem."""
+    sums = np.cumsum(np.concatenate(([0.0], values)))
+    counts = np.minimum(np.arange(1, len(values) + 1), window)
+    return (sums[1:] - sums[np.arange(len(values)) + 1 - counts]) / counts
+
+
+def pct_change(values):
+    """Variação percentual em relação ao mês anterior (NaN no primeiro mês e quando o anterior é zero)."""
+    change = np.full(len(values), np.nan)
+    previous = values[:-1]
+    np.divide(values[1:] - previous, previous, out=change[1:], where=previous != 0)
+    return change * 100
+
+
+def build_trend(rows, start_year, start_month, months, window=3):
+    """Monta as séries mensais e os indicadores derivados a partir das linhas de get_monthly_series.
+
+    Retorna um dicionário com arrays de ``months`` posições: 'renda', 'gastos',
+    'saldo', 'taxa_poupanca' (% da renda, NaN sem renda), 'media_movel_gastos',
+    'variacao_gastos' (% sobre o mês anterior) e a matriz 'gastos_por_categoria'
+    (uma linha por categoria de 'categorias').
+    """
+    base = start_year * 12 + start_month
+    if rows:
+        years, month_numbers, types, labels, totals = zip(*rows)
+        index = np.array(years) * 12 + np.array(month_numbers) - base
+        types = np.array(types)
+        totals = np.array(totals, dtype=float)
+    else:
+        index, types, totals, labels = np.array([], dtype=int), np.array([], dtype=str), np.array([], dtype=float), ()
+
+    is_expense = types == 'gasto'
+    is_income = types == 'renda'
+    income = np.bincount(index[is_income], weights=totals[is_income], minlength=months).astype(float)
+    expense = np.bincount(index[is_expense], weights=totals[is_expense], minlength=months).astype(float)
+
+    categories, category_index = np.unique(np.array(labels, dtype=object)[is_expense].astype(str), return_inverse=True)
+    by_category = np.zeros((len(categories), months))
+    np.add.at(by_category, (category_index, index[is_expense]), totals[is_expense])
+
+    savings_rate = np.full(months, np.nan)
+    np.divide((income - expense) * 100, income, out=savings_rate, where=income > 0)
+
+    return {
+        'meses': month_labels(start_year, start_month, months),
+        'renda': income,
+        'gastos': expense,
+        'saldo': income - expense,
+        'taxa_poupanca': savings_rate,
+        'media_movel_gastos': moving_average(expense, window),
+        'variacao_gastos': pct_change(expense),
+        'categorias': [str(c) for c in categories],
+        'gastos_por_categoria': by_category,
+    }
+
+
+def category_changes(trend, window=3, limit=3):
+    """Categorias cujo gasto médio nos últimos ``window`` meses mais subiu em relação aos meses anteriores.
+
+    Retorna até ``limit`` tuplas (categoria, média recente, média anterior); vazio se o período
+    não tiver meses suficientes para comparar.
+    """
+    by_category = trend['gastos_por_categoria']
+    if by_category.shape[1] <= window or not len(by_category):
+        return []
+    recent = by_category[:, -window:].mean(axis=1)
+    previous = by_category[:, :-window].mean(axis=1)
+    growth = recent - previous
+    order = np.argsort(-growth)[:limit]
+    return [(trend['categorias'][i], float(recent[i]), float(previous[i])) for i in order if growth[i] > 0]